@@ -0,0 +1,155 @@
+"""
+Load-tests the enrichment pipeline (process_metrics.main) against the local
+mock endpoint (mock_openai_server.py), so no quota or network is needed.
+
+Each run works in a fresh temp folder with a synthetic input.txt. It reports
+the achieved throughput and retry behaviour (from process_metrics' own metrics
+summary and the server's counters) and checks every stored result against
+what the server sent. That covers the extract_json path: malformed answers must
+be rejected, and every valid answer must be stored unchanged.
+
+Usage (from the backend folder):
+    python benchmarks/enrichment_load_test.py --words 2000 --latency lognormal:-1,0.5 \
+        --rate-429 0.05 --rate-5xx 0.02 --rate-malformed 0.02 --rpm 6000 --tpm 5000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import mock_openai_server  # noqa: E402
+
+DEFAULT_WORDS = 500
+
+
+def _input_words(count):
+    return [f"Mockwort{index:06d}" for index in range(count)]
+
+def _stored_entries(output_folder, levels):
+    """word -> (level, meaning array) for everything the run stored."""
+    stored = {}
+    for level in levels:
+        path = output_folder / f"output_{level}.json"
+        if not path.exists():
+            continue
+        for meanings_array in json.loads(path.read_text(encoding="utf-8")).values():
+            stored[meanings_array[0]["word"]] = (level, meanings_array)
+    return stored
+
+def check_results(words, stored, last_outcome):
+    """
+    Compares what was stored with what the server sent. A word may only be
+    missing if the last response covering it was an error, a malformed answer or
+    left it out; anything stored must equal the server's entry, in the right level.
+    """
+    report = {"stored_correctly": 0, "stored_wrong": [], "missing_expected": 0, "missing_unexpected": [],
+              "never_requested": []}
+    for word in words:
+        expected = mock_openai_server.expected_entry(word)
+        if word in stored:
+            level, meanings_array = stored[word]
+            if meanings_array == expected and level == expected[0]["level"]:
+                report["stored_correctly"] += 1
+            else:
+                report["stored_wrong"].append(word)
+            continue
+        outcome = last_outcome.get(word)
+        if outcome is None:
+            report["never_requested"].append(word)
+        elif outcome == "ok":
+            report["missing_unexpected"].append(word)
+        else:
+            report["missing_expected"] += 1
+    return report
+
+def run(args):
+    config = mock_openai_server.config_from_args(args)
+    server = mock_openai_server.start_server(config)
+    work_dir = Path(tempfile.mkdtemp(prefix="enrichment-load-"))
+    previous_cwd = os.getcwd()
+    try:
+        shutil.copy(BACKEND_DIR / "system_prompt.txt", work_dir / "system_prompt.txt")
+        words = _input_words(args.words)
+        (work_dir / "input.txt").write_text(",".join(words), encoding="utf-8")
+        # process_metrics resolves its files (and its log) relative to the working directory.
+        os.chdir(work_dir)
+        import process_metrics
+        process_metrics.OPENAI_URL = mock_openai_server.server_url(server)
+        process_metrics.API_KEY = "mock-key"
+        for name in ("rpm", "tpm", "max_concurrent", "words_per_request"):
+            value = getattr(args, name)
+            if value is not None:
+                setattr(process_metrics, name.upper(), value)
+
+        asyncio.run(process_metrics.main())
+
+        metrics = json.loads(Path(process_metrics.METRICS_FILE).read_text(encoding="utf-8"))
+        server_stats = config.snapshot()
+        correctness = check_results(words, _stored_entries(process_metrics.OUTPUT_FOLDER, process_metrics.LEVELS),
+                                    server_stats.pop("last_outcome"))
+    finally:
+        os.chdir(previous_cwd)
+        server.shutdown()
+        if args.keep:
+            print(f"Kept the run folder at {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "throughput": {
+            "words": args.words,
+            "elapsed_seconds": metrics["elapsed_seconds"],
+            "words_per_second": metrics["words_per_second"],
+            "requests_per_minute": metrics["requests_per_minute"],
+            "latency_seconds": {key: value for key, value in metrics["latency_seconds"].items() if key != "histogram"},
+            "limiter_wait_seconds": metrics["limiter_wait_seconds"],
+            "queue_wait_seconds": metrics["queue_wait_seconds"],
+            "final_concurrency_limit": metrics["concurrency_limit"],
+        },
+        "retries": {
+            "client_retries_by_status": metrics["retries_by_status"],
+            "client_failures_by_status": metrics["failures_by_status"],
+            "server_responses_by_status": server_stats["by_status"],
+            "server_malformed_by_kind": server_stats["malformed"],
+            "server_partial_batches": server_stats["partial"],
+        },
+        "correctness": {
+            "stored_correctly": correctness["stored_correctly"],
+            "missing_after_error_or_malformed": correctness["missing_expected"],
+            "stored_wrong": correctness["stored_wrong"][:10],
+            "missing_unexpected": correctness["missing_unexpected"][:10],
+            "never_requested": correctness["never_requested"][:10],
+            "ok": not (correctness["stored_wrong"] or correctness["missing_unexpected"]
+                       or correctness["never_requested"]),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test process_metrics against a local mock OpenAI endpoint.")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="Number of input words.")
+    parser.add_argument("--rpm", type=int, default=None, help="Override process_metrics.RPM.")
+    parser.add_argument("--tpm", type=int, default=None, help="Override process_metrics.TPM.")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Override process_metrics.MAX_CONCURRENT.")
+    parser.add_argument("--words-per-request", type=int, default=None, help="Override process_metrics.WORDS_PER_REQUEST.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp run folder (outputs, log, metrics).")
+    parser.add_argument("--json", dest="json_out", default=None, help="Also write the report to this JSON file.")
+    mock_openai_server.add_config_arguments(parser)
+    args = parser.parse_args()
+
+    report = run(args)
+    print("\n=== Enrichment load test ===")
+    print(json.dumps(report, indent=2))
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    sys.exit(0 if report["correctness"]["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
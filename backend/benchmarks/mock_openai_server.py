@@ -0,0 +1,239 @@
+"""
+A local stand-in for the OpenAI `/v1/responses` endpoint, for load-testing the
+enrichment pipeline (process_metrics.py) without network access or quota.
+
+It answers the prompts process_metrics sends (one word, or a batch of words)
+with deterministic vocabulary entries, so a harness can check every stored
+result. Latency follows a configurable distribution, and a share of the
+requests can be answered with 429 (with Retry-After), 5xx or a 200 whose text
+is not valid JSON. GET /stats returns what was served.
+
+Usage (from the backend folder):
+    python benchmarks/mock_openai_server.py --port 8765 --latency lognormal:-0.5,0.5 --rate-429 0.05
+and point process_metrics.OPENAI_URL at http://127.0.0.1:8765/v1/responses.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LEVELS = ["a1", "a2", "b1"]
+MALFORMED_KINDS = ["truncated", "prose", "fenced"]
+ERROR_STATUSES = [500, 502, 503]
+
+_BATCH_WORD = re.compile(r'^- "(.*)"$', re.MULTILINE)
+_SINGLE_WORD = re.compile(r'German word: "(.*)"')
+
+
+def parse_latency(spec):
+    """
+    Turns a latency spec into a function returning seconds:
+    fixed:S, uniform:LO,HI, exponential:MEAN or lognormal:MU,SIGMA.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+def expected_entry(word):
+    """The meaning array the server returns for `word`; the harness compares stored results with it."""
+    level = LEVELS[int(hashlib.sha256(word.encode("utf-8")).hexdigest(), 16) % len(LEVELS)]
+    return [{
+        "word": word,
+        "meaning": f"arti dari {word}",
+        "level": level,
+        "type": "Nomen",
+        "register": "netral",
+        "context": f"Konteks umum untuk {word}.",
+        "example": f"Beispiel mit {word}. (Contoh.)",
+    }]
+
+def words_in_prompt(prompt):
+    """The words a process_metrics prompt asks for, and whether it is a batched prompt."""
+    batch = _BATCH_WORD.findall(prompt)
+    if batch:
+        return batch, True
+    match = _SINGLE_WORD.search(prompt)
+    return ([match.group(1)] if match else []), False
+
+
+class MockConfig:
+    def __init__(self, latency="fixed:0.05", rate_429=0.0, rate_5xx=0.0, rate_malformed=0.0,
+                 rate_partial=0.0, retry_after=1.0, seed=0):
+        self.latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.rate_malformed = rate_malformed
+        self.rate_partial = rate_partial     # Share of batched answers that leave one word out
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "by_status": {}, "malformed": {}, "partial": 0, "words_answered": 0}
+        # word -> outcome of the last response that covered it: ok, left_out, malformed or an HTTP status
+        self.last_outcome = {}
+
+    def draw(self):
+        """Picks the outcome and latency of one request (thread-safe, reproducible for a seed)."""
+        with self.lock:
+            roll = self.rng.random()
+            latency = max(0.0, self.latency(self.rng))
+            if roll < self.rate_429:
+                outcome = 429
+            elif roll < self.rate_429 + self.rate_5xx:
+                outcome = self.rng.choice(ERROR_STATUSES)
+            elif roll < self.rate_429 + self.rate_5xx + self.rate_malformed:
+                outcome = self.rng.choice(MALFORMED_KINDS)
+            else:
+                outcome = "ok"
+            partial = self.rng.random() < self.rate_partial
+        return outcome, latency, partial
+
+    def record(self, status, words, outcome, malformed_kind=None, left_out=None, partial=False):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["by_status"][str(status)] = self.stats["by_status"].get(str(status), 0) + 1
+            if malformed_kind:
+                self.stats["malformed"][malformed_kind] = self.stats["malformed"].get(malformed_kind, 0) + 1
+            if partial:
+                self.stats["partial"] += 1
+            for word in words:
+                self.last_outcome[word] = "left_out" if word == left_out else outcome
+            if outcome == "ok":
+                self.stats["words_answered"] += len(words) - (1 if left_out else 0)
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.stats, "last_outcome": dict(self.last_outcome)}
+
+
+def _malformed_text(kind, text):
+    if kind == "truncated":
+        return text[: max(1, len(text) // 2)]
+    if kind == "prose":
+        return f"Here is the JSON you asked for:\n{text}"
+    return f"```json\n{text}\n```"
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # Keep the harness output readable
+
+        def _send(self, status, body, headers=None):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, json.dumps(config.snapshot()))
+            else:
+                self._send(404, json.dumps({"error": "not found"}))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not self.path.endswith("/v1/responses"):
+                self._send(404, json.dumps({"error": "not found"}))
+                return
+            try:
+                request = json.loads(body)
+                prompt = request["input"][-1]["content"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                self._send(400, json.dumps({"error": {"message": "invalid request body"}}))
+                return
+            words, batched = words_in_prompt(prompt)
+            outcome, latency, partial = config.draw()
+            time.sleep(latency)
+
+            if outcome == 429:
+                config.record(429, words, 429)
+                self._send(429, json.dumps({"error": {"message": "Rate limit reached"}}),
+                           {"Retry-After": f"{config.retry_after:g}"})
+                return
+            if isinstance(outcome, int):
+                config.record(outcome, words, outcome)
+                self._send(outcome, json.dumps({"error": {"message": "Server error"}}))
+                return
+
+            left_out = words[-1] if batched and partial and len(words) > 1 else None
+            if batched:
+                answer = {word: {word: expected_entry(word)} for word in words if word != left_out}
+            else:
+                answer = {word: expected_entry(word) for word in words}
+            text = json.dumps(answer, ensure_ascii=False)
+            malformed_kind = outcome if outcome in MALFORMED_KINDS else None
+            if malformed_kind:
+                text = _malformed_text(malformed_kind, text)
+            config.record(200, words, "malformed" if malformed_kind else "ok", malformed_kind,
+                          None if malformed_kind else left_out, bool(left_out) and not malformed_kind)
+            input_tokens = (len(prompt) + len(request["input"][0].get("content", ""))) // 4
+            output_tokens = len(text) // 4
+            response = {
+                "id": "resp_mock",
+                "object": "response",
+                "model": request.get("model"),
+                "output": [{"type": "message", "role": "assistant",
+                            "content": [{"type": "output_text", "text": text}]}],
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                          "total_tokens": input_tokens + output_tokens},
+            }
+            self._send(200, json.dumps(response, ensure_ascii=False))
+
+    return Handler
+
+
+def start_server(config, host="127.0.0.1", port=0):
+    """Starts the server in a daemon thread. Returns it; its URL is server_url(server)."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1/responses"
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="fixed:S, uniform:LO,HI, exponential:MEAN or lognormal:MU,SIGMA (seconds).")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Share of requests answered with 500/502/503.")
+    parser.add_argument("--rate-malformed", type=float, default=0.0, help="Share of 200s whose text is not valid JSON.")
+    parser.add_argument("--rate-partial", type=float, default=0.0, help="Share of batched answers that leave a word out.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429.")
+    parser.add_argument("--seed", type=int, default=0)
+
+def config_from_args(args):
+    return MockConfig(args.latency, args.rate_429, args.rate_5xx, args.rate_malformed,
+                      args.rate_partial, args.retry_after, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI /v1/responses endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config_from_args(args)))
+    print(f"Mock OpenAI endpoint at {server_url(server)} (stats at /stats). Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
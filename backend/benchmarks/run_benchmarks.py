@@ -0,0 +1,160 @@
+"""
+Micro-benchmarks for the backend hot paths at realistic data sizes.
+
+For every size a synthetic data set is generated (see synthetic_data.py) and
+each benchmark runs in a fresh subprocess, so module-level caches start cold.
+Every size is measured twice: once for wall time and once under tracemalloc
+for peak memory, so the tracing overhead does not distort the timings.
+
+Usage (from the backend folder):
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import synthetic_data  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_REPEATS = 5
+BENCH_LEVEL = "a1"
+
+
+class _Measure:
+    """Times (or traces the peak memory of) one benchmark step."""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    def run(self, name, fn, repeats=1):
+        if self.trace_memory:
+            tracemalloc.start()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.results[name] = {"peak_kib": peak / 1024}
+            return
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        self.results[name] = {"ms": sum(timings) / len(timings) * 1000, "runs": repeats}
+
+
+def _worker(trace_memory, repeats):
+    """Runs every benchmark once against the data set in the current directory."""
+    import cache
+    import data_manager
+    import report_manager
+    from logic import quiz_selector
+    from services import quiz_service
+    from server import app
+
+    m = _Measure(trace_memory)
+    # Warm-up runs only matter for the timing pass; the memory pass traces cold calls.
+    warm_repeats = 1 if trace_memory else repeats
+
+    m.run("cache.get_word_details_map (cold)", cache.get_word_details_map)
+    m.run("cache.get_word_to_level_map (cold)", cache.get_word_to_level_map)
+    m.run("report_manager.load_report_data (first, migrates)", report_manager.load_report_data)
+    m.run("report_manager.load_report_data (warm)", report_manager.load_report_data, warm_repeats)
+    m.run("quiz_selector.select_quiz_words (first)", lambda: quiz_selector.select_quiz_words(BENCH_LEVEL, None))
+    m.run("quiz_selector.select_quiz_words (warm)", lambda: quiz_selector.select_quiz_words(BENCH_LEVEL, None), warm_repeats)
+
+    results = synthetic_data.sample_results(".", 5)
+    def process_batch():
+        quiz_service.process_quiz_results(results)
+        data_manager.flush_repetition_stats()
+    m.run("quiz_service.process_quiz_results (5, first)", process_batch)
+    m.run("quiz_service.process_quiz_results (5, warm)", process_batch, warm_repeats)
+
+    client = app.test_client()
+    def debrief():
+        response = client.get(f"/api/report/daily_debrief/{BENCH_LEVEL}")
+        assert response.status_code == 200, response.status_code
+    m.run("report_routes.get_daily_debrief", debrief, warm_repeats)
+    return m.results
+
+
+def _run_size(size, data_root, repeats, keep_data):
+    data_dir = Path(data_root) / f"vocab-{size}"
+    if not (data_dir / "output").exists():
+        summary = synthetic_data.generate(data_dir, size)
+        print(f"Generated {summary['words']} words / {summary['items']} items in {data_dir}")
+    # The data set is mutated by the benchmarks (stats import, report split),
+    # so each pass gets its own copy.
+    measurements = {}
+    for trace_memory in (False, True):
+        with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as work_dir:
+            shutil.copytree(data_dir, work_dir, dirs_exist_ok=True)
+            cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", "--repeats", str(repeats)]
+            if trace_memory:
+                cmd.append("--trace-memory")
+            completed = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True)
+            if completed.returncode != 0:
+                raise RuntimeError(f"Benchmark worker failed for size {size}:\n{completed.stderr}")
+            # The worker prints its JSON results on the last stdout line.
+            for name, values in json.loads(completed.stdout.strip().splitlines()[-1]).items():
+                measurements.setdefault(name, {}).update(values)
+    if not keep_data:
+        shutil.rmtree(data_dir)
+    return measurements
+
+def _print_table(all_results):
+    names = list(next(iter(all_results.values())).keys())
+    sizes = list(all_results.keys())
+    header = f"{'benchmark':<52}" + "".join(f"{f'{size:,} words':>26}" for size in sizes)
+    print("\n" + header)
+    print(f"{'':<52}" + "".join(f"{'time ms / peak MiB':>26}" for _ in sizes))
+    print("-" * len(header))
+    for name in names:
+        row = f"{name:<52}"
+        for size in sizes:
+            values = all_results[size].get(name, {})
+            row += f"{values.get('ms', float('nan')):>15.2f} / {values.get('peak_kib', float('nan')) / 1024:>7.1f}"
+        print(row)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend hot paths on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Vocabulary sizes (words).")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Runs per warm benchmark.")
+    parser.add_argument("--data-root", default=None, help="Where to keep generated data sets (default: a temp dir).")
+    parser.add_argument("--json", dest="json_out", default=None, help="Also write the results to this JSON file.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        results = _worker(args.trace_memory, args.repeats)
+        print(json.dumps(results))
+        return
+
+    data_root = args.data_root or tempfile.mkdtemp(prefix="bench-data-")
+    all_results = {}
+    for size in args.sizes:
+        print(f"--- Benchmarking {size:,} words ---")
+        all_results[size] = _run_size(size, data_root, args.repeats, keep_data=args.data_root is not None)
+    _print_table(all_results)
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\nResults written to {args.json_out}")
+    if args.data_root is None:
+        os.rmdir(data_root)
+
+
+if __name__ == "__main__":
+    main()
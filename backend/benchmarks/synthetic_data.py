@@ -0,0 +1,154 @@
+"""
+Generates a synthetic vocabulary, repetition stats and performance report at a
+configurable size, laid out exactly like the real data folders:
+
+    <root>/output/output_<level>.json
+    <root>/repetition-list/<level>_repetition.json
+    <root>/performance-report/repetition_report.json
+
+Usage (from the backend folder):
+    python benchmarks/synthetic_data.py --words 10000 --out /tmp/vocab-10k
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+LEVELS = ["a1", "a2", "b1"]
+WORD_TYPES = ["Nomen", "Verb", "Adjektiv", "Adverb"]
+ARTICLES = ["der", "die", "das"]
+RESULT_TYPES = ["PERFECT_MATCH", "NO_MATCH", "PARTIAL_MATCH_WRONG_ARTICLE"]
+
+
+def _meaning(word, index, level, rng):
+    word_type = rng.choice(WORD_TYPES)
+    meaning = {
+        "word": word,
+        "meaning": f"arti {index} dari {word}",
+        "level": level,
+        "type": word_type,
+        "register": "netral",
+        "context": f"Konteks umum untuk {word}.",
+        "example": "; ".join(f"Beispiel {n} mit {word}. (Contoh {n}.)" for n in range(3)),
+    }
+    if word_type == "Nomen":
+        meaning["article"] = rng.choice(ARTICLES)
+        meaning["plural"] = f"{word}en"
+    return meaning
+
+def _stats(rng, now):
+    total = rng.randint(1, 40)
+    right = rng.randint(0, total)
+    history = [rng.randint(0, 1) for _ in range(min(total, 100))]
+    last_seen = now - timedelta(days=rng.uniform(0, 60))
+    next_show = last_seen + timedelta(days=rng.choice([0, 1, 2, 4, 7, 14, 30]))
+    return {
+        "right": right,
+        "wrong": total - right,
+        "article_wrong": rng.randint(0, 3),
+        "total_encountered": total,
+        "last_seen": last_seen.isoformat(),
+        "last_correct": last_seen.isoformat() if right else None,
+        "consecutive_correct": rng.randint(0, 2),
+        "streak_level": rng.randint(0, 5),
+        "current_delay_days": rng.randint(0, 30),
+        "next_show_date": next_show.isoformat(),
+        "recent_history": history,
+        "failed_first_encounter": rng.random() < 0.3,
+        "last_result_was_wrong": history[-1] == 0 if history else False,
+        "successful_corrections": rng.randint(0, 5),
+        "is_starred": rng.random() < 0.01,
+        "is_learned": False,
+    }
+
+def generate(root, n_words, meanings_per_word=3, stats_fraction=0.6, report_days=90, seen_per_day=150, seed=0):
+    """
+    Writes a synthetic data set of `n_words` words (spread over all levels, with
+    1..`meanings_per_word` meanings each) under `root`. Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    now = datetime.now()
+    (root / "output").mkdir(parents=True, exist_ok=True)
+    (root / "repetition-list").mkdir(parents=True, exist_ok=True)
+    (root / "performance-report").mkdir(parents=True, exist_ok=True)
+
+    item_keys_by_level = {level: [] for level in LEVELS}
+    for level_index, level in enumerate(LEVELS):
+        words = {}
+        stats = {}
+        for n in range(level_index, n_words, len(LEVELS)):
+            word = f"{level}wort{n:07d}"
+            meanings = [_meaning(word, i, level, rng) for i in range(rng.randint(1, meanings_per_word))]
+            words[word] = meanings
+            for meaning in meanings:
+                item_key = f"{word}#{meaning['meaning']}"
+                item_keys_by_level[level].append(item_key)
+                if rng.random() < stats_fraction:
+                    stats[item_key] = _stats(rng, now)
+        with open(root / "output" / f"output_{level}.json", 'w', encoding='utf-8') as f:
+            json.dump(words, f, ensure_ascii=False, indent=2)
+        with open(root / "repetition-list" / f"{level}_repetition.json", 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=2)
+
+    report = {
+        "word_learned": {level: {} for level in LEVELS},
+        "daily_seen_words": {},
+        "daily_wrong_counts": {},
+        "daily_article_wrong_counts": {},
+        "daily_level_correct_counts": {},
+        "daily_level_wrong_counts": {},
+        "daily_level_article_wrong_counts": {},
+        "category_performance": {t: {"right": 0, "wrong": 0} for t in WORD_TYPES},
+    }
+    for day_offset in range(report_days, -1, -1):
+        date_str = (now - timedelta(days=day_offset)).strftime('%Y-%m-%d')
+        seen = {}
+        for level in LEVELS:
+            keys = item_keys_by_level[level]
+            seen[level] = rng.sample(keys, k=min(seen_per_day // len(LEVELS), len(keys)))
+        report["daily_seen_words"][date_str] = seen
+        report["daily_wrong_counts"][date_str] = {
+            key: rng.randint(1, 3) for level_keys in seen.values() for key in level_keys if rng.random() < 0.3
+        }
+        report["daily_article_wrong_counts"][date_str] = {
+            key: 1 for level_keys in seen.values() for key in level_keys if rng.random() < 0.05
+        }
+        report["daily_level_correct_counts"][date_str] = {level: rng.randint(0, 100) for level in LEVELS}
+        report["daily_level_wrong_counts"][date_str] = {level: rng.randint(0, 40) for level in LEVELS}
+        report["daily_level_article_wrong_counts"][date_str] = {level: rng.randint(0, 10) for level in LEVELS}
+    with open(root / "performance-report" / "repetition_report.json", 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return {
+        "words": n_words,
+        "items": sum(len(keys) for keys in item_keys_by_level.values()),
+        "report_days": report_days + 1,
+    }
+
+def sample_results(root, count, seed=0):
+    """Returns a batch of `count` synthetic /api/update results for items in `root`."""
+    rng = random.Random(seed)
+    results = []
+    for level in LEVELS:
+        with open(Path(root) / "output" / f"output_{level}.json", 'r', encoding='utf-8') as f:
+            words = json.load(f)
+        for word in rng.sample(list(words), k=min(count, len(words))):
+            meaning = rng.choice(words[word])
+            results.append({"word": f"{word}#{meaning['meaning']}", "result_type": rng.choice(RESULT_TYPES)})
+    rng.shuffle(results)
+    return results[:count]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic vocabulary and stats data set.")
+    parser.add_argument("--words", type=int, default=10_000, help="Total number of words across all levels.")
+    parser.add_argument("--meanings", type=int, default=3, help="Maximum meanings per word.")
+    parser.add_argument("--stats-fraction", type=float, default=0.6, help="Share of items that already have stats.")
+    parser.add_argument("--days", type=int, default=90, help="Days of report history.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Folder to write the data set into.")
+    args = parser.parse_args()
+    summary = generate(args.out, args.words, args.meanings, args.stats_fraction, args.days, seed=args.seed)
+    print(f"Generated {summary['words']} words / {summary['items']} items / {summary['report_days']} report days in {args.out}")
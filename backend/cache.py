@@ -1,10 +1,117 @@
+import gc
+import hashlib
+import threading
+
 import data_manager
+from safe_io import atomic_write_bytes
+from vocab_store import VocabularyFile, LevelItems, WordDetails, encode_vocabulary
 
+# --- NEW: The memory-mapped vocabulary every lookup below reads from ---
+_vocab = None
 # --- The single source for the word-to-level mapping cache ---
 _word_level_map = None
-# --- NEW: The single source for the word-to-details mapping cache ---
-_word_details_map = None
+_load_lock = threading.Lock()
+
+
+def _normalize_item_key(item_key):
+    """Strips the meaning part of an item_key, matching how lookups compared meanings."""
+    base_word, meaning_str = item_key.split('#', 1)
+    return f"{base_word}#{meaning_str.strip()}"
+
+
+def _source_fingerprint(path, previous=None):
+    """
+    Describes an output file by size, mtime and SHA-256. The hash is only
+    recomputed when size or mtime differ from `previous`.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+        return previous
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+
+def _current_sources(previous_sources=None):
+    previous_sources = previous_sources or {}
+    return {
+        lvl: _source_fingerprint(data_manager.get_output_file_path(lvl), previous_sources.get(lvl))
+        for lvl in data_manager.LEVELS
+    }
+
+def _sources_match(recorded, current):
+    """Compares fingerprints by content, so a touched but unchanged file keeps the vocabulary file valid."""
+    if recorded.keys() != current.keys():
+        return False
+    for lvl, fingerprint in current.items():
+        other = recorded[lvl]
+        if (fingerprint is None) != (other is None):
+            return False
+        if fingerprint is not None and fingerprint["sha256"] != other["sha256"]:
+            return False
+    return True
 
+def _read_level_words():
+    """Reads every output file once. Returns { level: { word: [meaning, ...] } }."""
+    return {lvl: data_manager.load_output_words(lvl) for lvl in data_manager.LEVELS}
+
+def _open_vocabulary():
+    """
+    Opens the vocabulary file if it still matches the output files, otherwise
+    rebuilds it from them. Falls back to an in-memory copy if it cannot be written.
+    """
+    vocab_path = data_manager.VOCAB_FILE
+    vocab = None
+    try:
+        vocab = VocabularyFile.open(vocab_path)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read vocabulary file {vocab_path}: {e}. Rebuilding it.")
+
+    if vocab is not None:
+        current = _current_sources(vocab.sources)
+        if _sources_match(vocab.sources, current):
+            if current == vocab.sources:
+                return vocab, "vocabulary file"
+            # Same content, new mtimes: re-encode so the next start skips hashing.
+            print("INFO: Output files were touched but not changed. Refreshing the vocabulary file.")
+        else:
+            print("INFO: Vocabulary files changed since the vocabulary file was built. Rebuilding it.")
+        sources = current
+    else:
+        sources = _current_sources()
+
+    payload = encode_vocabulary(_read_level_words(), sources)
+    try:
+        atomic_write_bytes(vocab_path, payload)
+        return VocabularyFile.open(vocab_path), "output files"
+    except OSError as e:
+        print(f"WARNING: Could not write vocabulary file {vocab_path}: {e}. Keeping it in memory.")
+        return VocabularyFile(payload), "output files"
+
+def _ensure_vocabulary():
+    """Opens the vocabulary on first use; every lookup below goes through it."""
+    global _vocab
+    if _vocab is not None:
+        return _vocab
+    with _load_lock:
+        if _vocab is None:
+            print("Initializing vocabulary caches...")
+            # Decoding the index creates a few hundred thousand small objects, none
+            # of them garbage; pausing the cyclic GC keeps it from rescanning them.
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                vocab, origin = _open_vocabulary()
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            _vocab = vocab
+            print(f"Vocabulary caches initialized from {origin} with {len(vocab.word_ids)} words.")
+    return _vocab
 
 def get_word_to_level_map():
     """
@@ -12,45 +119,43 @@ def get_word_to_level_map():
     This avoids reading multiple files on every API call.
     """
     global _word_level_map
+    vocab = _ensure_vocabulary()
     if _word_level_map is None:
-        print("Initializing word-to-level map cache...")
-        _word_level_map = {}
-        for lvl in data_manager.LEVELS:
-            # load_output_words now returns { word: [details_array] }
-            words_data = data_manager.load_output_words(lvl)
-            for word_key in words_data.keys():
-                # This map can still overwrite, which is fine for its original purpose
-                # of providing a 'primary' level, but we know its limitation.
-                _word_level_map[word_key] = lvl
-        print(f"Cache initialized with {len(_word_level_map)} words.")
+        # Like before, a word found in several levels maps to the last one.
+        _word_level_map = {word: vocab.level_of(ids[-1]) for word, ids in vocab.word_ids.items()}
     return _word_level_map
 
 def get_word_details_map():
     """
-    Creates and caches a mapping from each base word to its full array of meaning objects.
-    This avoids reading files to look up word metadata during updates.
-    THIS FUNCTION IS NOW FIXED TO MERGE MEANINGS AND ADD LEVEL INFO.
-    """
-    global _word_details_map
-    if _word_details_map is None:
-        print("Initializing word-to-details map cache...")
-        _word_details_map = {}
-        for lvl in data_manager.LEVELS:
-            level_words_data = data_manager.load_output_words(lvl)
-            
-            for word, meanings_list in level_words_data.items():
-                # --- THIS IS THE FIX ---
-                # Inject the level into each meaning object before processing
-                for meaning in meanings_list:
-                    meaning['level'] = lvl
-                # --- END FIX ---
-
-                if word in _word_details_map:
-                    # If the word already exists, extend its list of meanings
-                    _word_details_map[word].extend(meanings_list)
-                else:
-                    # Otherwise, create a new entry
-                    _word_details_map[word] = meanings_list
-
-        print(f"Details cache initialized with {len(_word_details_map)} words.")
-    return _word_details_map
\ No newline at end of file
+    Returns a read-only mapping from each base word to its full array of meaning objects.
+    Meanings of a word found in several levels are merged; each one carries its level.
+    The meanings are decoded from the vocabulary file on every access.
+    """
+    return WordDetails(_ensure_vocabulary())
+
+def get_level_items(level):
+    """
+    Returns { item_key: item } for every meaning in a level's output file, where
+    item["item_key"], item["base_word"] and item["type"] come from the resident
+    index and item["details"] decodes the meaning object. Used by the quiz
+    selector and the due-date index.
+    """
+    return LevelItems(_ensure_vocabulary(), level)
+
+def get_level_word_count(level):
+    """Returns the number of words in a level's output file."""
+    info = _ensure_vocabulary().levels.get(level)
+    return info["word_count"] if info else 0
+
+def get_item_details(item_key):
+    """
+    Looks up and decodes the meaning object for an item_key. Returns None if unknown.
+    The result is a fresh dict, so callers may modify it.
+    """
+    if not item_key or '#' not in item_key:
+        return None
+    vocab = _ensure_vocabulary()
+    item_id = vocab.index_key_ids.get(item_key)
+    if item_id is None:
+        item_id = vocab.index_key_ids.get(_normalize_item_key(item_key))
+    return vocab.decode(item_id) if item_id is not None else None
\ No newline at end of file
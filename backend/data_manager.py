@@ -1,10 +1,22 @@
-import json
 from pathlib import Path
-import copy # <-- IMPORT THE COPY MODULE
+from repetition_store import RepetitionStore
+from session_store import QuizSessionStore
+from stats_cache import WriteBehindStatsCache
+from stats_record import REPETITION_SCHEMA, StatsRecord  # noqa: F401 (REPETITION_SCHEMA is re-exported)
+from safe_io import InterProcessLock, atomic_write_text
+import json_codec
+import user_state
 
 # Centralized configuration for file paths
+# Per-learner paths are relative to the learner's folder (see user_state.py).
 OUTPUT_FOLDER = Path("output")
 REPETITION_FOLDER = Path("repetition-list")
+VOCAB_FILE = OUTPUT_FOLDER / "vocab.bin"  # Memory-mapped vocabulary index (see vocab_store.py)
+REPETITION_DB_FILE = REPETITION_FOLDER / "repetition_stats.db"
+QUIZ_SESSION_DB_FILE = REPETITION_FOLDER / "quiz_sessions.db"  # Prefetched quiz sessions (see session_service.py)
+DATA_VERSION_FILE = REPETITION_FOLDER / "data_version"  # Bumped on every change to stats or report
+STATS_FLUSH_INTERVAL_SECONDS = 2.0  # How often cached stat writes are flushed to disk
+APPLIED_JOURNAL_ID_KEY = "applied_journal_id"  # store_meta key of the last journal entry in the stats
 LEVELS = ["a1", "a2", "b1"]
 
 # --- NEW: Centralized gameplay configuration ---
@@ -17,65 +29,124 @@ MASTERY_GOAL = 3           # 3 consecutive correct answers for mastery
 FAILURE_THRESHOLD = 3      # 3 total wrong answers for failure
 LEARNED_THRESHOLD_DAYS = 21 # <-- ADD THIS: Word is "learned" when interval is >= 21 days
 
-# The single source of truth for a new word's repetition stats.
-REPETITION_SCHEMA = {
-    "right": 0,
-    "wrong": 0,
-    "article_wrong": 0,
-    "total_encountered": 0,
-    "last_seen": None,
-    "last_correct": None,
-    "consecutive_correct": 0,
-    "streak_level": 0,
-    "current_delay_days": 0,
-    "next_show_date": None,
-    "recent_history": [],
-    "failed_first_encounter": False,
-    "last_result_was_wrong": False,
-    "successful_corrections": 0,
-    "is_starred": False,
-    "is_learned": False, # <-- ADD THIS: Tracks long-term learned status
-}
-
-# --- NEW FUNCTION TO FIX THE BUG ---
+# --- NEW: A new word's repetition stats are a compact StatsRecord ---
+# REPETITION_SCHEMA (the JSON layout and defaults) now lives in stats_record.py.
 def get_new_repetition_schema():
     """
-    Returns a deep copy of the repetition schema to ensure mutable objects
-    like lists and dicts are not shared between different word stats.
+    Returns a fresh StatsRecord holding the default repetition stats. Records
+    behave like the stats dicts they replace and never share mutable state.
     """
-    return copy.deepcopy(REPETITION_SCHEMA)
+    return StatsRecord()
 
-def load_repetition_stats(level):
-    """Loads user repetition stats from a specific level's JSON file."""
-    REPETITION_FOLDER.mkdir(exist_ok=True)
-    file_path = REPETITION_FOLDER / f"{level}_repetition.json"
-    if not file_path.exists():
-        return {}
+# --- NEW: The single-writer lock for stats and report changes ---
+# Every load-modify-save of a learner's repetition stats or report (journal
+# compaction, star toggles) runs while holding it, across threads and server processes.
+def get_stats_write_lock():
+    """Returns the current learner's single-writer lock."""
+    state = user_state.current()
+    return state.get_or_create(
+        "stats_write_lock", lambda: InterProcessLock(state.path(REPETITION_FOLDER) / ".stats_write.lock")
+    )
+
+# --- NEW: Repetition stats live in an embedded SQLite store per learner ---
+def get_repetition_store():
+    """
+    Returns the current learner's repetition stats store, creating it on first use.
+    Existing `<level>_repetition.json` files are imported into it once.
+    """
+    state = user_state.current()
+    return state.get_or_create(
+        "repetition_store", lambda: RepetitionStore(state.path(REPETITION_DB_FILE), state.path(REPETITION_FOLDER))
+    )
+
+def get_quiz_session_store():
+    """Returns the current learner's quiz session store, shared by every server process."""
+    state = user_state.current()
+    return state.get_or_create("quiz_session_store", lambda: QuizSessionStore(state.path(QUIZ_SESSION_DB_FILE)))
+
+def _create_stats_cache(state):
+    cache = WriteBehindStatsCache(get_repetition_store(), STATS_FLUSH_INTERVAL_SECONDS)
+    # Flush when the learner is evicted from memory or the process exits cleanly
+    state.add_close_hook(cache.close)
+    return cache
+
+def get_stats_cache():
+    """Returns the current learner's write-behind cache in front of their repetition store."""
+    state = user_state.current()
+    return state.get_or_create("stats_cache", lambda: _create_stats_cache(state))
+
+def load_repetition_stats(level, item_keys=None):
+    """
+    Loads user repetition stats for a specific level.
+    If `item_keys` is given, only the stats for those items are loaded (as copies
+    the caller may modify). A full-level load must be treated as read-only.
+    """
+    return get_stats_cache().load(level, item_keys)
+
+def save_repetition_stats(level, data, changed_keys=None):
+    """
+    Saves the repetition stats data for a specific level.
+    If `changed_keys` is given, only those items are written, in the background;
+    otherwise the stored level is replaced with `data` immediately.
+    """
+    get_stats_cache().save(level, data, changed_keys)
+
+def flush_repetition_stats(applied_journal_id=None):
+    """
+    Writes the current learner's cached, not yet flushed stats to disk. With
+    `applied_journal_id`, that journal entry is marked as applied in the same
+    transaction (see get_applied_journal_id).
+    """
+    if applied_journal_id is not None:
+        return get_stats_cache().flush(meta={APPLIED_JOURNAL_ID_KEY: applied_journal_id})
+    stats_cache = user_state.current().get("stats_cache")
+    if stats_cache is not None:
+        return stats_cache.flush()
+    return 0
+
+def discard_unflushed_stats():
+    """Drops the current learner's stat writes that were not flushed yet (after a failed update)."""
+    get_stats_cache().discard_unflushed()
+
+def hold_stats_flushes():
+    """A context manager that keeps cached stat writes out of the store until it exits."""
+    return get_stats_cache().hold_flushes()
+
+def get_applied_journal_id():
+    """Returns the id of the last journal entry whose stats changes are in the store (0 if none)."""
+    return get_repetition_store().get_meta(APPLIED_JOURNAL_ID_KEY)
+
+# --- NEW: A monotonic version of the learner's stats and report ---
+# Read-only endpoints derive their ETag from it, so a poll can be answered with
+# 304 before any stats or report file is loaded.
+def get_data_version():
+    """Returns the current learner's data version (0 until the first change)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return {}
+        return int(user_state.current().path(DATA_VERSION_FILE).read_text(encoding='utf-8') or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
 
-def save_repetition_stats(level, data):
-    """Saves the repetition stats data for a specific level."""
-    REPETITION_FOLDER.mkdir(exist_ok=True)
-    file_path = REPETITION_FOLDER / f"{level}_repetition.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def bump_data_version():
+    """Increments the current learner's data version. Returns the new version."""
+    with get_stats_write_lock():
+        version = get_data_version() + 1
+        atomic_write_text(user_state.current().path(DATA_VERSION_FILE), str(version))
+    return version
 
+def get_output_file_path(level):
+    """Returns the path of a level's vocabulary file."""
+    return OUTPUT_FOLDER / f"output_{level}.json"
 
 def load_output_words(level):
     """
     Loads all word data from a specific output file.
     The new structure is { "word": [ {meaning_obj_1}, {meaning_obj_2} ] }.
     """
-    file_path = OUTPUT_FOLDER / f"output_{level}.json"
+    file_path = get_output_file_path(level)
     if not file_path.exists():
         return {}
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_codec.load_file(file_path)
 
         # The new structure is already { word: [details_array] }.
         # We need to handle the old numeric key format if it exists.
@@ -93,5 +164,5 @@ def load_output_words(level):
         
         return data
 
-    except (json.JSONDecodeError, IOError):
+    except (json_codec.DecodeError, IOError):
         return {}
\ No newline at end of file
@@ -0,0 +1,48 @@
+import argparse
+from pathlib import Path
+import json_codec
+from safe_io import atomic_write_json
+
+# --- Pretty-print export for humans ---
+# The app stores its JSON compactly (see json_codec.COMPACT_STORAGE). This tool
+# writes indented copies of those files, by default into EXPORT_FOLDER, keeping
+# the folder structure. The originals are left untouched unless --in-place is given.
+DEFAULT_SOURCES = [Path("output"), Path("performance-report"), Path("result-journal"), Path("users")]
+EXPORT_FOLDER = Path("pretty-export")
+
+
+def _json_files(source):
+    if source.is_file():
+        return [source]
+    return sorted(path for path in source.rglob("*.json") if path.is_file())
+
+def export_pretty(sources, out_folder=EXPORT_FOLDER, in_place=False):
+    """Writes an indented copy of every JSON file under `sources`. Returns the number of files written."""
+    written = 0
+    for source in sources:
+        if not source.exists():
+            continue
+        for path in _json_files(source):
+            try:
+                data = json_codec.load_file(path)
+            except (json_codec.DecodeError, IOError) as e:
+                print(f"WARNING: Skipping {path}: {e}")
+                continue
+            # An absolute path would replace out_folder when joined; keep it below out_folder.
+            relative = path.relative_to(path.anchor) if path.is_absolute() else path
+            target = path if in_place else out_folder / relative
+            atomic_write_json(target, data, pretty=True)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write indented copies of the app's JSON files.")
+    parser.add_argument("paths", nargs="*", type=Path, help="Files or folders to export (default: the data folders).")
+    parser.add_argument("--out", type=Path, default=EXPORT_FOLDER, help="Folder for the copies.")
+    parser.add_argument("--in-place", action="store_true", help="Re-indent the files themselves instead of copying.")
+    args = parser.parse_args()
+
+    count = export_pretty(args.paths or DEFAULT_SOURCES, args.out, args.in_place)
+    destination = "in place" if args.in_place else f"to {args.out}"
+    print(f"INFO: Exported {count} JSON files {destination}.")
@@ -1,9 +1,87 @@
-import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import json_codec
+from safe_io import atomic_write_bytes, atomic_write_json
 
 # --- Configuration ---
 OUTPUT_FOLDER = Path("output")
 LEVELS = ["a1", "a2", "b1"]
+# --- NEW: Change detection ---
+# SHA-256 of every level file as the validator last left it (sorted, every meaning in its level).
+STATE_FILE = OUTPUT_FOLDER / "validator_state.json"
+PARALLEL_WORKERS = len(LEVELS)  # Processes used to parse changed files; 1 parses in this process
+EXAMPLES_SHOWN = 5              # Word keys listed per problem in the summary
+
+
+def _level_path(level):
+    return OUTPUT_FOLDER / f"output_{level}.json"
+
+def _digest(payload):
+    return hashlib.sha256(payload).hexdigest()
+
+def _load_state():
+    try:
+        state = json_codec.load_file(STATE_FILE)
+    except (OSError, json_codec.DecodeError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+def _save_state(new_state, old_state):
+    if new_state != old_state:
+        atomic_write_json(STATE_FILE, new_state)
+
+def _same_content(payload, word_dict):
+    """True if `payload` parses to `word_dict` with the same key order."""
+    try:
+        existing = json_codec.loads(payload)
+    except json_codec.DecodeError:
+        return False
+    return isinstance(existing, dict) and list(existing.items()) == list(word_dict.items())
+
+def _is_standardized(level, word_dict):
+    """
+    True if `word_dict` is exactly what standardizing would produce for `level`:
+    every entry is a list of meanings of this level and the keys are already in
+    case-insensitive order.
+    """
+    previous = None
+    for word_key, meanings_array in word_dict.items():
+        lowered = word_key.lower()
+        if previous is not None and lowered < previous:
+            return False
+        previous = lowered
+        if not isinstance(meanings_array, list) or not meanings_array:
+            return False
+        for meaning_obj in meanings_array:
+            if not isinstance(meaning_obj, dict) or str(meaning_obj.get("level", "")).strip().lower() != level:
+                return False
+    return True
+
+def _inspect_level_file(level, path):
+    """
+    Parses one level file (in a worker process). Data is only sent back when the
+    file needs work, so already-standardized files cost no transfer.
+    """
+    try:
+        word_dict = json_codec.load_file(path)
+    except json_codec.DecodeError:
+        return {"level": level, "status": "invalid", "data": {}}
+    if not isinstance(word_dict, dict):
+        return {"level": level, "status": "invalid", "data": {}}
+    if _is_standardized(level, word_dict):
+        return {"level": level, "status": "clean", "entries": len(word_dict)}
+    return {"level": level, "status": "dirty", "data": word_dict}
+
+def _inspect_all(paths_by_level):
+    if PARALLEL_WORKERS > 1 and len(paths_by_level) > 1:
+        with ProcessPoolExecutor(max_workers=min(PARALLEL_WORKERS, len(paths_by_level))) as pool:
+            return list(pool.map(_inspect_level_file, paths_by_level.keys(), paths_by_level.values()))
+    return [_inspect_level_file(level, path) for level, path in paths_by_level.items()]
+
+def _examples(word_keys):
+    shown = ", ".join(f"'{key}'" for key in word_keys[:EXAMPLES_SHOWN])
+    return shown + (f" and {len(word_keys) - EXAMPLES_SHOWN} more" if len(word_keys) > EXAMPLES_SHOWN else "")
 
 def validate_and_standardize_files():
     """
@@ -16,92 +94,136 @@ def validate_and_standardize_files():
         (output_a1.json, output_a2.json, etc.).
     2.  Standardizes ALL files by sorting their entries alphabetically by the
         word key, ensuring a consistent and predictable file structure.
+
+    Files whose content hash matches the last run are not parsed at all, files
+    that are already standardized are not rewritten, and a file is only written
+    when its content actually changes.
     """
     print("--- Starting Vocabulary File Validator & Standardizer ---")
-    
-    # Step 1: Load all data from all level files into memory
-    all_data_by_file = {}
+
+    # Step 1: Find the files that changed since the validator last left them standardized.
+    state = _load_state()
+    current_bytes = {}
+    unchanged = []
     for level in LEVELS:
-        file_path = OUTPUT_FOLDER / f"output_{level}.json"
-        if file_path.exists():
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    all_data_by_file[level] = json.load(f)
-                print(f"✅ Loaded {file_path} ({len(all_data_by_file[level])} word entries)")
-            except json.JSONDecodeError:
-                print(f"⚠️  Error: Could not parse {file_path}. Treating as empty.")
-                all_data_by_file[level] = {}
-        else:
-            print(f"ℹ️  Info: File {file_path} not found. Will create if needed.")
-            all_data_by_file[level] = {}
-
-    # --- REFINED LOGIC ---
-    # Step 2: Create a new, corrected data structure from scratch.
-    # This will hold the final, correctly distributed data.
+        file_path = _level_path(level)
+        if not file_path.exists():
+            continue
+        payload = file_path.read_bytes()
+        current_bytes[level] = payload
+        if state.get(level) == _digest(payload):
+            unchanged.append(level)
+    to_inspect = {level: _level_path(level) for level in current_bytes if level not in unchanged}
+    missing = [level for level in LEVELS if level not in current_bytes]
+    print(f"Unchanged since last run: {', '.join(unchanged) or 'none'}. "
+          f"To check: {', '.join(to_inspect) or 'none'}. Missing: {', '.join(missing) or 'none'}.")
+
+    # Step 2: Parse the changed files in parallel and detect the ones that are already standardized.
+    new_state = {level: state[level] for level in unchanged}
+    loaded = {}
+    for result in _inspect_all(to_inspect):
+        level = result["level"]
+        if result["status"] == "clean":
+            new_state[level] = _digest(current_bytes[level])
+            print(f"✅ {_level_path(level)} is already standardized ({result['entries']} word entries).")
+            continue
+        if result["status"] == "invalid":
+            print(f"⚠️  Error: Could not parse {_level_path(level)}. Treating as empty.")
+        loaded[level] = result["data"]
+
+    if not loaded:
+        _save_state(new_state, state)
+        print("\n--- Nothing to redistribute or rewrite. Validator & Standardizer Finished Successfully ---")
+        return
+
+    # Step 3: Redistribute the meanings of the files that need work. Files that receive
+    # relocated meanings are loaded too; files that neither send nor receive are left alone.
     corrected_data = {level: {} for level in LEVELS}
-    total_meanings_relocated = 0
+    relocated = {}       # (source, target) -> number of meanings
+    invalid_entries = []
+    invalid_levels = []
     total_meanings_processed = 0
 
-    print("\n--- Phase 1: Validating and redistributing every word meaning... ---")
-    
-    # Iterate through all the data we loaded, file by file.
-    for source_level, word_dict in all_data_by_file.items():
-        # Iterate through each word (e.g., "meinen") in the current file.
+    def redistribute(source_level, word_dict):
+        nonlocal total_meanings_processed
         for word_key, meanings_array in word_dict.items():
             if not isinstance(meanings_array, list):
-                print(f"   - ⚠️  Warning: Invalid entry for word '{word_key}' in {source_level}.json (not a list). Skipping.")
+                invalid_entries.append(word_key)
                 continue
-                
-            # Iterate through each meaning object within the word's list.
             for meaning_obj in meanings_array:
                 total_meanings_processed += 1
-                actual_level = meaning_obj.get("level", "").strip().lower()
-
-                if not actual_level or actual_level not in LEVELS:
-                    print(f"   - ⚠️  Warning: Meaning for '{word_key}' has invalid/missing level: '{actual_level}'. Skipping.")
-                    print(f"     -> Meaning: '{meaning_obj.get('meaning', 'N/A')}'")
+                actual_level = str(meaning_obj.get("level", "")).strip().lower() if isinstance(meaning_obj, dict) else ""
+                if actual_level not in LEVELS:
+                    invalid_levels.append(word_key)
                     continue
+                yield word_key, actual_level, meaning_obj
 
-                # This is the core logic: place the meaning object into the correct level's dictionary.
-                # setdefault ensures that if the word_key doesn't exist yet in the target level,
-                # it creates an empty list for it before appending the meaning.
-                corrected_data[actual_level].setdefault(word_key, []).append(meaning_obj)
+    placements = {level: list(redistribute(level, loaded[level])) for level in loaded}
+    involved = set(loaded)
+    for placed in placements.values():
+        involved.update(actual_level for _, actual_level, _ in placed)
+    for level in involved - set(loaded):
+        # An unchanged, standardized file that receives meanings; its own meanings already belong here.
+        try:
+            placements[level] = list(redistribute(level, json_codec.load_file(_level_path(level))))
+        except FileNotFoundError:
+            placements[level] = []
+        except json_codec.DecodeError:
+            print(f"⚠️  Error: Could not parse {_level_path(level)}. Treating as empty.")
+            placements[level] = []
 
-                # Track if a meaning was in the wrong file.
-                if actual_level != source_level:
-                    total_meanings_relocated += 1
-                    print(f"   - ➡️  Relocating meaning for '{word_key}' from {source_level}.json to {actual_level}.json.")
-                    print(f"     -> Meaning: '{meaning_obj.get('meaning', 'N/A')}'")
+    # Sources are visited in LEVELS order, so a word's meanings keep the order a full pass would give.
+    for source_level in LEVELS:
+        for word_key, actual_level, meaning_obj in placements.get(source_level, ()):
+            corrected_data[actual_level].setdefault(word_key, []).append(meaning_obj)
+            if actual_level != source_level:
+                relocated[(source_level, actual_level)] = relocated.get((source_level, actual_level), 0) + 1
 
-    if total_meanings_relocated == 0:
+    print("\n--- Phase 1: Redistribution summary ---")
+    if not relocated:
         print("✅ No misplaced word meanings found.")
-    else:
-        print(f"✅ Relocated {total_meanings_relocated} word meanings successfully.")
-    
-    print(f"Processed a total of {total_meanings_processed} meanings across all files.")
-
-    # Step 3: Standardize and write the corrected data to the files.
-    print("\n--- Phase 2: Standardizing all files by sorting alphabetically... ---")
-    for level, data_dict in corrected_data.items():
-        # Sort the dictionary items by key (the word) case-insensitively.
-        sorted_items = sorted(data_dict.items(), key=lambda item: item[0].lower())
-        
-        # Create a new dictionary from the sorted items.
-        standardized_dict = dict(sorted_items)
-        
-        output_path = OUTPUT_FOLDER / f"output_{level}.json"
-        # Only write the file if it contains data, to avoid empty files.
-        if standardized_dict:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(standardized_dict, f, ensure_ascii=False, indent=2)
-            print(f"   - ✅ Wrote {output_path} with {len(standardized_dict)} sorted word entries.")
-        elif output_path.exists():
-            # If the file should now be empty, we remove it.
-            output_path.unlink()
-            print(f"   - 🗑️  Removed {output_path} as it is now empty.")
+    for (source_level, actual_level), count in sorted(relocated.items()):
+        print(f"   - ➡️  Relocated {count} meanings from {source_level}.json to {actual_level}.json.")
+    if invalid_entries:
+        print(f"   - ⚠️  Skipped {len(invalid_entries)} entries that are not lists: {_examples(invalid_entries)}.")
+    if invalid_levels:
+        print(f"   - ⚠️  Skipped {len(invalid_levels)} meanings with an invalid/missing level: {_examples(invalid_levels)}.")
+    print(f"Processed {total_meanings_processed} meanings in {len(involved)} files.")
 
+    # Step 4: Sort and write only the files whose content changes.
+    print("\n--- Phase 2: Standardizing changed files by sorting alphabetically... ---")
+    written = 0
+    for level in LEVELS:
+        if level not in involved:
+            continue
+        # Sort the dictionary items by key (the word) case-insensitively.
+        standardized_dict = dict(sorted(corrected_data[level].items(), key=lambda item: item[0].lower()))
+        output_path = _level_path(level)
+        if not standardized_dict:
+            new_state.pop(level, None)
+            if output_path.exists():
+                # If the file should now be empty, we remove it.
+                output_path.unlink()
+                written += 1
+                print(f"   - 🗑️  Removed {output_path} as it is now empty.")
+            continue
+        payload = json_codec.dumps_for_storage(standardized_dict)
+        existing = current_bytes.get(level)
+        if existing is None and output_path.exists():
+            existing = output_path.read_bytes()
+        if existing is not None and (existing == payload or _same_content(existing, standardized_dict)):
+            # Same content (possibly formatted differently); leave the file and its mtime alone.
+            new_state[level] = _digest(existing)
+            continue
+        atomic_write_bytes(output_path, payload)
+        new_state[level] = _digest(payload)
+        written += 1
+        print(f"   - ✅ Wrote {output_path} with {len(standardized_dict)} sorted word entries.")
+    if written == 0:
+        print("   - No file content changed.")
 
+    _save_state(new_state, state)
     print("\n--- Validator & Standardizer Finished Successfully ---")
 
 if __name__ == "__main__":
-    validate_and_standardize_files()
\ No newline at end of file
+    validate_and_standardize_files()
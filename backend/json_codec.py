@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is used instead.
+    orjson = None
+
+# --- Storage configuration ---
+# Files the app writes for itself (report partitions, vocabulary files, the
+# journal checkpoint) are stored without indentation. Run export_pretty_json.py
+# to get an indented copy for reading.
+COMPACT_STORAGE = True
+
+if orjson is not None:
+    # Keys like ints are written as strings, like the json module does.
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+    DecodeError = orjson.JSONDecodeError  # A subclass of json.JSONDecodeError
+else:
+    DecodeError = json.JSONDecodeError
+
+
+def is_fast():
+    """Returns True if the orjson encoder is used."""
+    return orjson is not None
+
+def _storage_pretty(pretty):
+    return not COMPACT_STORAGE if pretty is None else pretty
+
+def dumps_bytes(obj, pretty=False, default=None):
+    """
+    Serializes `obj` to UTF-8 JSON bytes (non-ASCII characters are kept as is).
+    `pretty` indents by 2 spaces. `default` converts objects JSON does not
+    know and raises TypeError for anything else, as with json.dumps.
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, default=default, option=options)
+    return dumps(obj, pretty, default).encode('utf-8')
+
+def dumps(obj, pretty=False, default=None):
+    """Like `dumps_bytes`, but returns a str."""
+    if orjson is not None:
+        return dumps_bytes(obj, pretty, default).decode('utf-8')
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    # Match orjson's compact separators so both encoders write the same bytes.
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+
+def loads(data):
+    """Parses JSON from a str, bytes or memoryview. Raises DecodeError (a ValueError) if invalid."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+def load_file(path):
+    """Reads and parses a JSON file. Raises OSError or DecodeError."""
+    return loads(Path(path).read_bytes())
+
+def dumps_for_storage(obj, pretty=None, default=None):
+    """Serializes `obj` for a file: compact unless COMPACT_STORAGE is off or `pretty` is given."""
+    return dumps_bytes(obj, _storage_pretty(pretty), default)
@@ -0,0 +1,102 @@
+import heapq
+import threading
+from datetime import date, datetime
+import data_manager
+import user_state
+from cache import get_level_items
+
+# One index per learner and level, built lazily from the stored stats and then
+# kept up to date incrementally whenever an item's next_show_date changes. An index
+# is rebuilt when another server process has changed that level's stats since it was built.
+_lock = threading.Lock()
+
+
+def _to_day(next_show_str):
+    """Converts a next_show_date string to a date ordinal, or None if it is unscheduled."""
+    if not next_show_str:
+        return None
+    try:
+        return datetime.fromisoformat(next_show_str).date().toordinal()
+    except (ValueError, TypeError):
+        return None
+
+
+class _LevelDueIndex:
+    """
+    Tracks which items of one level are due.
+    Items scheduled for a future day sit in per-day buckets; a min-heap of the
+    bucket days lets expired buckets be moved into the due set in O(moved).
+    """
+
+    def __init__(self, generation):
+        self.generation = generation
+        self.due = set()
+        self.buckets = {}        # day ordinal -> set of item_keys
+        self.bucket_days = []    # min-heap of the days in `buckets`
+        self.scheduled_day = {}  # item_key -> day ordinal, for bucketed items
+
+    def place(self, item_key, next_show_str, today):
+        day = _to_day(next_show_str)
+        # Unscheduled items (never seen) are always due, like before.
+        if day is None or day <= today:
+            self.due.add(item_key)
+            return
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = set()
+            heapq.heappush(self.bucket_days, day)
+        bucket.add(item_key)
+        self.scheduled_day[item_key] = day
+
+    def remove(self, item_key):
+        self.due.discard(item_key)
+        day = self.scheduled_day.pop(item_key, None)
+        if day is not None:
+            self.buckets[day].discard(item_key)
+
+    def promote(self, today):
+        """Moves every bucket whose day has arrived into the due set."""
+        while self.bucket_days and self.bucket_days[0] <= today:
+            day = heapq.heappop(self.bucket_days)
+            for item_key in self.buckets.pop(day, ()):
+                self.due.add(item_key)
+                self.scheduled_day.pop(item_key, None)
+
+
+def _current_indexes():
+    """Returns the current learner's { level: _LevelDueIndex }."""
+    return user_state.current().get_or_create("due_indexes", dict)
+
+def _build(level, generation):
+    level_items = get_level_items(level)
+    all_repetition_stats = data_manager.load_repetition_stats(level)
+    today = date.today().toordinal()
+    index = _LevelDueIndex(generation)
+    for item_key in level_items:
+        index.place(item_key, all_repetition_stats.get(item_key, {}).get('next_show_date'), today)
+    return index
+
+def get_due_item_keys(level):
+    """Returns the set of item_keys in a level that are due today."""
+    generation = data_manager.get_stats_cache().get_generation(level)
+    indexes = _current_indexes()
+    with _lock:
+        index = indexes.get(level)
+        if index is None or index.generation != generation:
+            index = indexes[level] = _build(level, generation)
+        index.promote(date.today().toordinal())
+        return set(index.due)
+
+def reschedule(level, item_key, next_show_str):
+    """
+    Records a new next_show_date for an item.
+    Call this whenever the scheduling logic changes an item's next_show_date.
+    """
+    indexes = _current_indexes()
+    with _lock:
+        index = indexes.get(level)
+        # An index that has not been built yet will read the new date from the store.
+        if index is None or item_key not in get_level_items(level):
+            return
+        index.remove(item_key)
+        index.place(item_key, next_show_str, date.today().toordinal())
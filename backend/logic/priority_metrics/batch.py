@@ -0,0 +1,137 @@
+import re
+from datetime import datetime
+from itertools import chain
+
+from stats_record import history_summary
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; callers fall back to the scalar metrics.
+    np = None
+
+_MICROSECONDS_PER_DAY = 86_400_000_000
+# YYYY-MM-DD, optionally followed by THH:MM[:SS[.ffffff]] and no offset.
+_NAIVE_ISO = re.compile(r"\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?)?")
+
+
+def is_available():
+    """Returns True if the vectorized scoring path can be used."""
+    return np is not None
+
+
+def _parse_last_seen(values):
+    """
+    Converts last_seen strings to microsecond timestamps.
+    Returns (timestamps, valid_mask); unparseable or missing values are invalid.
+    """
+    n = len(values)
+    timestamps = np.zeros(n, dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+    # NumPy also accepts strings datetime.fromisoformat rejects ('2025', 'NaT') and
+    # converts timezone offsets, so only plain naive ISO dates and times are parsed in bulk.
+    fast, slow = [], []
+    for i, value in enumerate(values):
+        if isinstance(value, str) and _NAIVE_ISO.fullmatch(value):
+            fast.append(i)
+        elif value:
+            slow.append(i)
+    if fast:
+        try:
+            parsed = np.array([values[i] for i in fast], dtype='datetime64[us]')
+            timestamps[fast] = parsed.astype(np.int64)
+            valid[fast] = True
+        except (ValueError, TypeError):
+            # e.g. '2026-13-45'; let the per-item path sort out which ones are bad.
+            slow.extend(fast)
+    for i in slow:
+        try:
+            parsed = datetime.fromisoformat(values[i])
+        except (ValueError, TypeError):
+            continue
+        if parsed.tzinfo is not None:
+            # datetime.now() - aware datetime raises TypeError in the scalar path, which scores 0.
+            continue
+        timestamps[i] = np.datetime64(parsed, 'us').astype(np.int64)
+        valid[i] = True
+    return timestamps, valid
+
+
+def stats_to_columns(stats_list, details_list):
+    """
+    Packs per-item stats (StatsRecords or dicts) and meaning objects into the column arrays
+    consumed by `calculate_priority_scores`.
+    """
+    n = len(stats_list)
+    columns = {
+        'right': np.fromiter((s.get('right', 0) for s in stats_list), dtype=np.float64, count=n),
+        'wrong': np.fromiter((s.get('wrong', 0) for s in stats_list), dtype=np.float64, count=n),
+        'article_wrong': np.fromiter((s.get('article_wrong', 0) for s in stats_list), dtype=np.float64, count=n),
+        'total_encountered': np.fromiter((s.get('total_encountered', 0) for s in stats_list), dtype=np.float64, count=n),
+        'successful_corrections': np.fromiter((s.get('successful_corrections', 0) for s in stats_list), dtype=np.float64, count=n),
+        'is_starred': np.fromiter((bool(s.get('is_starred', False)) for s in stats_list), dtype=bool, count=n),
+        'failed_first_encounter': np.fromiter((bool(s.get('failed_first_encounter', False)) for s in stats_list), dtype=bool, count=n),
+        'is_noun': np.fromiter((d.get('type') == 'Nomen' for d in details_list), dtype=bool, count=n),
+    }
+    columns['last_seen_us'], columns['last_seen_valid'] = _parse_last_seen([s.get('last_seen') for s in stats_list])
+
+    # StatsRecords answer length and flips straight from their packed history bits.
+    summaries = np.fromiter(
+        chain.from_iterable(history_summary(s) for s in stats_list), dtype=np.int64, count=2 * n
+    ).reshape(n, 2)
+    columns['history_len'] = summaries[:, 0]
+    columns['history_flips'] = summaries[:, 1]
+    return columns
+
+
+def calculate_priority_scores(columns, now=None):
+    """
+    Computes the final priority of every item in one vectorized pass.
+    Mirrors quiz_selector.calculate_item_priority metric by metric, including
+    the starred and first-encounter overrides, and returns a float64 array.
+    """
+    now = now or datetime.now()
+    right = columns['right']
+    wrong = columns['wrong']
+    article_wrong = columns['article_wrong']
+    total = columns['total_encountered']
+
+    # accuracy.calculate_accuracy_score
+    safe_total = np.where(total == 0, 1, total)
+    accuracy_weight = (1 - right / safe_total) * 50
+    mistake_weight = np.minimum(wrong * 5, 40)
+    accuracy_score = np.where(total == 0, 100.0, accuracy_weight + mistake_weight)
+
+    # recency.calculate_recency_score
+    now_us = np.datetime64(now, 'us').astype(np.int64)
+    days_since = np.floor_divide(now_us - columns['last_seen_us'], _MICROSECONDS_PER_DAY)
+    recency_score = np.where(columns['last_seen_valid'], np.minimum(days_since, 10), 0)
+
+    # volatility.calculate_volatility_score
+    lengths = columns['history_len']
+    flips = columns['history_flips']
+    volatility_score = np.where(lengths > 3, np.minimum(flips * 7, 35), 0)
+
+    # article_weakness.calculate_article_weakness_score
+    total_errors = article_wrong + wrong
+    safe_errors = np.where(total_errors > 0, total_errors, 1)
+    is_weak = columns['is_noun'] & (total_errors > 0) & (article_wrong / safe_errors > 0.6)
+    article_score = np.where(is_weak, 20, 0)
+
+    # stickiness.calculate_stickiness_score
+    total_mistakes = wrong + article_wrong
+    safe_mistakes = np.where(total_mistakes > 2, total_mistakes, 1)
+    sticky_rate = columns['successful_corrections'] / safe_mistakes
+    stickiness_score = np.where((total_mistakes > 2) & (sticky_rate < 0.5), (1 - (sticky_rate * 2)) * 30, 0.0)
+
+    first_encounter_boost = np.where(columns['failed_first_encounter'], 10, 0)
+
+    # Same summation order as the scalar path so the floats match exactly.
+    total_priority = (
+        accuracy_score +
+        recency_score +
+        volatility_score +
+        article_score +
+        stickiness_score +
+        first_encounter_boost
+    )
+    return np.where(columns['is_starred'], 1000.0, np.minimum(total_priority, 100))
@@ -1,7 +1,11 @@
+import heapq
+import math
 import random
-from datetime import datetime, date
+from datetime import datetime
 import data_manager
 import report_manager
+from cache import get_level_items, get_level_word_count
+from . import due_index
 
 # Import individual metric calculators
 from .priority_metrics import (
@@ -9,9 +13,12 @@ from .priority_metrics import (
     article_weakness,
     recency,
     stickiness,
-    volatility
+    volatility,
+    batch
 )
 
+QUIZ_SIZE = 5  # Words per quiz round
+
 def calculate_item_priority(stats, meaning_details):
     """
     Aggregates scores from various metrics to determine a specific item's final priority.
@@ -32,84 +39,83 @@ def calculate_item_priority(stats, meaning_details):
     return min(total_priority, 100)
 
 
-def weighted_random_selection(items_with_priorities, count=5):
-    """Selects unique items using weighted random selection without replacement."""
+def calculate_item_priorities(stats_list, details_list):
+    """
+    Scores many items at once. Uses the vectorized batch path when NumPy is
+    installed and falls back to `calculate_item_priority` per item otherwise.
+    """
+    if not stats_list:
+        return []
+    if batch.is_available():
+        columns = batch.stats_to_columns(stats_list, details_list)
+        return batch.calculate_priority_scores(columns).tolist()
+    return [calculate_item_priority(stats, details) for stats, details in zip(stats_list, details_list)]
+
+
+def weighted_random_selection(items_with_priorities, count=5, rng=None):
+    """
+    Selects unique items using weighted random selection without replacement.
+    Uses Efraimidis-Spirakis keys (log(u) / weight), which gives the same
+    distribution as drawing one item at a time proportionally to its weight,
+    in O(n + k log n). Items with no positive weight are only used, uniformly
+    at random, once every positively weighted item has been taken.
+    Pass a seeded `random.Random` as `rng` for reproducible selections.
+    """
+    rng = rng or random
     if len(items_with_priorities) <= count:
         items = [item for item, p in items_with_priorities]
-        random.shuffle(items)
+        rng.shuffle(items)
         return items
 
-    population = [item[0] for item in items_with_priorities]
-    weights = [p for w, p in items_with_priorities]
-    selected = []
-
-    while len(selected) < count and population:
-        if sum(weights) <= 0:
-            remaining_needed = count - len(selected)
-            if len(population) > 0:
-                selected.extend(random.sample(population, k=min(remaining_needed, len(population))))
-            break
+    keyed = []
+    zero_weight_items = []
+    for item, weight in items_with_priorities:
+        if weight > 0:
+            # 1 - random() lies in (0, 1], so log() is always defined.
+            keyed.append((-math.log(1.0 - rng.random()) / weight, len(keyed), item))
+        else:
+            zero_weight_items.append(item)
 
-        chosen = random.choices(population, weights=weights, k=1)[0]
-        selected.append(chosen)
+    heapq.heapify(keyed)
+    selected = [heapq.heappop(keyed)[2] for _ in range(min(count, len(keyed)))]
 
-        idx = population.index(chosen)
-        population.pop(idx)
-        weights.pop(idx)
+    remaining_needed = count - len(selected)
+    if remaining_needed > 0 and zero_weight_items:
+        selected.extend(rng.sample(zero_weight_items, k=min(remaining_needed, len(zero_weight_items))))
 
     return selected
 
-def select_quiz_words(level, word_to_level_map):
+def _score_candidates(level, rng=None):
     """
-    Main logic for selecting words. This version strictly enforces the daily new word limit per level.
+    Runs the due-date, new-word-limit and priority computation for a level once.
+    Returns (session_info, [(item, priority), ...]) for every eligible item.
+    `rng` is used to draw the new words (see weighted_random_selection).
     """
-    all_word_details_map = data_manager.load_output_words(level)
-    all_repetition_stats = data_manager.load_repetition_stats(level)
+    level_items = get_level_items(level)
     limit_for_this_level = data_manager.DAILY_NEW_WORD_LIMITS.get(level, 25)
 
     session_info = {
         "daily_word_limit": limit_for_this_level,
-        "total_words_in_level": len(all_word_details_map),
+        "total_words_in_level": get_level_word_count(level),
         "mastery_goal": data_manager.MASTERY_GOAL,
         "failure_threshold": data_manager.FAILURE_THRESHOLD,
     }
 
-    if not all_word_details_map:
-        return {"quiz_words": [], "session_info": session_info}
-
-    all_learnable_items = []
-    for base_word, meanings_array in all_word_details_map.items():
-        for meaning_obj in meanings_array:
-            item_key = f"{meaning_obj['word']}#{meaning_obj['meaning']}"
-            all_learnable_items.append({
-                "item_key": item_key,
-                "base_word": base_word,
-                "details": meaning_obj
-            })
-
-    due_items = []
-    today = date.today()
-    for item in all_learnable_items:
-        stats = all_repetition_stats.get(item["item_key"], {})
-        next_show_str = stats.get('next_show_date')
-        
-        # --- THIS IS THE FIX ---
-        # A word is due ONLY if its scheduled date has passed.
-        # Starring is a priority boost, not a schedule override.
-        is_due = not next_show_str or (datetime.fromisoformat(next_show_str).date() <= today if next_show_str else True)
-        
-        if is_due:
-            due_items.append(item)
+    if not level_items:
+        return session_info, []
+
+    # --- NEW: The due-date index hands us only the due items ---
+    # A word is due ONLY if its scheduled date has passed (or it was never scheduled).
+    # Starring is a priority boost, not a schedule override.
+    # Sorted, because the index hands out a set whose order depends on the hash seed;
+    # a seeded rng must see the items in the same order on every run.
+    due_item_keys = sorted(due_index.get_due_item_keys(level))
+    due_items = [level_items[item_key] for item_key in due_item_keys]
+    all_repetition_stats = data_manager.load_repetition_stats(level, due_item_keys)
 
-    report_data = report_manager.load_report_data()
     today_str = datetime.now().strftime('%Y-%m-%d')
-    # This dictionary contains { "a1": ["word1#meaningA"], "b1": ["word2#meaningB"] }
-    seen_today_by_level_item_keys = report_data.get('daily_seen_words', {}).get(today_str, {})
-    
-    # Create a single set of all item_keys seen today, regardless of level, for efficient lookup.
-    all_seen_item_keys_today = set()
-    for item_keys in seen_today_by_level_item_keys.values():
-        all_seen_item_keys_today.update(item_keys)
+    # The day's seen sets and counts are kept up to date at write time, so this is an O(1) lookup.
+    today_aggregates = report_manager.load_day_aggregates(today_str)
 
     # 1. Separate all due items into two groups: those already seen today (reviews)
     # and those not yet seen today (potential new words).
@@ -117,7 +123,7 @@ def select_quiz_words(level, word_to_level_map):
     new_items = []
 
     for item in due_items:
-        if item["item_key"] in all_seen_item_keys_today:
+        if today_aggregates.was_seen(item["item_key"]):
             review_items.append(item)
         else:
             new_items.append(item)
@@ -128,34 +134,70 @@ def select_quiz_words(level, word_to_level_map):
     
     if new_items:
         # Determine how many new ITEM_KEYS we are allowed to introduce for this level.
-        seen_count_for_level = len(seen_today_by_level_item_keys.get(level, []))
+        seen_count_for_level = today_aggregates.seen_count(level)
         new_word_slots = limit_for_this_level - seen_count_for_level
         
         if new_word_slots > 0:
             # We have room for new items. Calculate their priorities.
-            new_items_with_priorities = [
-                (item, calculate_item_priority(all_repetition_stats.get(item["item_key"], {}), item["details"]))
-                for item in new_items
-            ]
+            # The priority metrics only read the word 'type', which the vocabulary
+            # index items carry, so no meaning object is decoded for scoring.
+            new_item_priorities = calculate_item_priorities(
+                [all_repetition_stats.get(item["item_key"], {}) for item in new_items],
+                new_items
+            )
+            new_items_with_priorities = list(zip(new_items, new_item_priorities))
 
             num_new_to_select = min(new_word_slots, len(new_items_with_priorities))
-            selected_new = weighted_random_selection(new_items_with_priorities, num_new_to_select)
+            selected_new = weighted_random_selection(new_items_with_priorities, num_new_to_select, rng)
             final_selection.extend(selected_new)
 
-    # 3. Trim the final pool to the quiz size (5) and format for the frontend.
-    final_selection_with_priorities = [
-        (item, calculate_item_priority(all_repetition_stats.get(item["item_key"], {}), item["details"]))
-        for item in final_selection
-    ]
+    # 3. Score the final pool; callers draw their quiz words from it.
+    final_priorities = calculate_item_priorities(
+        [all_repetition_stats.get(item["item_key"], {}) for item in final_selection],
+        final_selection
+    )
+    final_selection_with_priorities = list(zip(final_selection, final_priorities))
     
     final_selection_with_priorities.sort(key=lambda x: x[1], reverse=True)
+    return session_info, final_selection_with_priorities
 
-    quiz_items = weighted_random_selection(final_selection_with_priorities, 5)
-
+def format_quiz_words(level, item_keys):
+    """Decodes the meaning objects of the given items for the frontend, tagged with their item_key."""
+    level_items = get_level_items(level)
     final_quiz_details = []
-    for item in quiz_items:
-        detail = item["details"].copy()
-        detail['item_key'] = item['item_key']
+    for item_key in item_keys:
+        if item_key not in level_items:
+            continue
+        # Only the chosen words are decoded from the vocabulary file (a fresh dict each time).
+        detail = level_items[item_key]["details"]
+        detail['item_key'] = item_key
         final_quiz_details.append(detail)
-            
-    return {"quiz_words": final_quiz_details, "session_info": session_info}
\ No newline at end of file
+    return final_quiz_details
+
+def select_quiz_words(level, word_to_level_map, rng=None):
+    """
+    Main logic for selecting words. This version strictly enforces the daily new word limit per level.
+    Pass a seeded `random.Random` as `rng` for a reproducible selection.
+    """
+    session_info, candidates = _score_candidates(level, rng)
+    quiz_items = weighted_random_selection(candidates, QUIZ_SIZE, rng)
+    return {
+        "quiz_words": format_quiz_words(level, [item["item_key"] for item in quiz_items]),
+        "session_info": session_info,
+    }
+
+def select_quiz_rounds(level, rounds, round_size=None, rng=None):
+    """
+    Selects up to `rounds` quizzes of `round_size` distinct words from a single
+    scoring pass. The weighted draw yields items in sampling order, so the first
+    round has the same distribution as `select_quiz_words`.
+    Pass a seeded `random.Random` as `rng` for a reproducible selection.
+    Returns {"rounds": [[item_key, ...], ...], "session_info": {...}}.
+    """
+    round_size = round_size or QUIZ_SIZE
+    session_info, candidates = _score_candidates(level, rng)
+    picked_keys = [item["item_key"] for item in weighted_random_selection(candidates, rounds * round_size, rng)]
+    return {
+        "rounds": [picked_keys[i:i + round_size] for i in range(0, len(picked_keys), round_size)],
+        "session_info": session_info,
+    }
@@ -1,6 +1,11 @@
-def update_reports_from_results(report_data, results, word_level_map, word_details_map):
+from cache import get_item_details
+from report_manager import DayAggregates
+
+def update_reports_from_results(report_data, results, aggregates=None):
     """
     Updates all performance report metrics based on a batch of quiz results.
+    `aggregates` are the cached DayAggregates of the day; they are updated in
+    step with the report so later reads need not re-scan it.
     """
     today_str = report_data['today_str']
 
@@ -12,23 +17,21 @@ def update_reports_from_results(report_data, results, word_level_map, word_detai
     daily_level_wrong = report_data.setdefault('daily_level_wrong_counts', {}).setdefault(today_str, {})
     daily_level_article_wrong = report_data.setdefault('daily_level_article_wrong_counts', {}).setdefault(today_str, {})
     category_performance = report_data.setdefault('category_performance', {})
+    if aggregates is None:
+        aggregates = DayAggregates({
+            'daily_seen_words': daily_seen,
+            'daily_level_correct_counts': daily_level_correct,
+            'daily_level_wrong_counts': daily_level_wrong,
+        })
 
     for result in results:
         item_key = result.get('word')
         if not item_key or '#' not in item_key:
             continue
             
-        base_word, meaning_str = item_key.split('#', 1)
-        
         # --- FIX #1: Determine level from the specific meaning object ---
-        meanings_array = word_details_map.get(base_word)
-        word_lvl = None
-        word_details = None
-
-        if meanings_array:
-            word_details = next((m for m in meanings_array if m['meaning'] == meaning_str), None)
-            if word_details and 'level' in word_details:
-                word_lvl = word_details['level'].lower()
+        word_details = get_item_details(item_key)
+        word_lvl = word_details['level'].lower() if word_details and 'level' in word_details else None
         
         if not word_lvl or not word_details:
             print(f"WARNING: Could not determine level/details for '{item_key}'. Skipping report update.")
@@ -37,9 +40,9 @@ def update_reports_from_results(report_data, results, word_level_map, word_detai
         result_type = result.get('result_type')
         
         # --- FIX #2: Use ITEM_KEY for tracking unique words seen today ---
-        seen_words_for_level = daily_seen.setdefault(word_lvl, [])
-        if item_key not in seen_words_for_level:
-            seen_words_for_level.append(item_key)
+        # The set answers the membership test; the list keeps the order for the file.
+        if aggregates.mark_seen(word_lvl, item_key):
+            daily_seen.setdefault(word_lvl, []).append(item_key)
 
         word_type = word_details.get('type')
         if word_type:
@@ -47,6 +50,7 @@ def update_reports_from_results(report_data, results, word_level_map, word_detai
         
         if result_type == "PERFECT_MATCH":
             daily_level_correct[word_lvl] = daily_level_correct.get(word_lvl, 0) + 1
+            aggregates.correct_by_level[word_lvl] = daily_level_correct[word_lvl]
             if word_type:
                 type_stats['right'] += 1
         
@@ -62,6 +66,7 @@ def update_reports_from_results(report_data, results, word_level_map, word_detai
 
         else: # NO_MATCH and any other non-perfect results
             daily_level_wrong[word_lvl] = daily_level_wrong.get(word_lvl, 0) + 1
+            aggregates.wrong_by_level[word_lvl] = daily_level_wrong[word_lvl]
             if word_type:
                 type_stats['wrong'] += 1
             
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
 import data_manager # <-- IMPORT THE ENTIRE MODULE
+from stats_record import StatsRecord
 
 HISTORY_MAX_LENGTH = 100
 HARD_WORD_THRESHOLD = 3
+# The result types the quiz client sends
+RESULT_TYPES = ("PERFECT_MATCH", "PARTIAL_MATCH_WRONG_ARTICLE", "NO_MATCH")
 
 def _update_stickiness_score(stats, is_correct):
     """Updates metrics related to "sticky correction"."""
@@ -88,6 +91,8 @@ def process_quiz_result(stats, result, daily_wrong_count):
     Updates a single item's stats based on a quiz result.
     Returns the new stats and a flag indicating if the word was just learned.
     """
+    if not isinstance(stats, StatsRecord):
+        stats = StatsRecord.from_dict(stats)
     result_type = result.get('result_type')
     is_correct = result_type == "PERFECT_MATCH"
     is_partial = "PARTIAL_MATCH" in result_type
@@ -97,10 +102,8 @@ def process_quiz_result(stats, result, daily_wrong_count):
     if stats.get('total_encountered') == 1 and not is_correct:
         stats['failed_first_encounter'] = True
 
-    history = stats.setdefault('recent_history', [])
-    history.append(1 if is_correct else 0)
-    if len(history) > HISTORY_MAX_LENGTH:
-        stats['recent_history'] = history[-HISTORY_MAX_LENGTH:]
+    # recent_history is a bit-packed ring buffer holding the latest answers.
+    stats.push_history(is_correct, HISTORY_MAX_LENGTH)
     
     stats = _update_stickiness_score(stats, is_correct)
     stats, was_just_learned = _update_scheduling(stats, is_correct, is_partial, daily_wrong_count)
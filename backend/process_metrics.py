@@ -1,12 +1,16 @@
 import os
-import json
 import re
+import hashlib
 import asyncio
 import aiohttp
+from itertools import count
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from time import time
+from time import monotonic, time
 import logging
 from dotenv import load_dotenv
+import json_codec
+from safe_io import atomic_write_json, atomic_write_text
 
 # Load .env (OPENAI_API_KEY)
 load_dotenv()
@@ -15,6 +19,20 @@ load_dotenv()
 INPUT_FILE = Path("input.txt")
 OUTPUT_FOLDER = Path("output")
 LEVELS = ["a1", "a2", "b1"]
+# --- NEW: Streaming writes and resumable runs ---
+CHECKPOINT_FILE = OUTPUT_FOLDER / "enrichment_checkpoint.json"  # Input words that already got an answer
+FLUSH_EVERY_RESULTS = 25      # Save the output files after this many answers...
+FLUSH_INTERVAL_SECONDS = 30.0 # ...or after this long, whichever comes first
+# --- NEW: Response cache ---
+RESPONSE_CACHE_FOLDER = Path("response_cache")  # Raw API responses, one file per (model, prompt, word); None disables it
+# --- NEW: Batched prompts ---
+WORDS_PER_REQUEST = 8           # Words packed into one request; 1 sends each word on its own
+BATCH_TOKEN_BUDGET = 20_000     # Estimated tokens (prompt + expected output) allowed per batched request
+BATCH_ROUNDS = 3                # Words left out of a batched answer are re-sent at most this many times
+# --- NEW: Run metrics ---
+METRICS_FILE = Path("enrichment_metrics.json")  # JSON summary of the last run
+PROGRESS_INTERVAL_SECONDS = 15.0                 # How often a progress line is printed
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)  # Upper bounds (seconds) of the latency histogram
 
 # --- Unchanged Configuration ---
 MODEL = "gpt-5-mini"
@@ -26,6 +44,14 @@ TPM = 200_000
 MAX_CONCURRENT = 20
 RETRY_LIMIT = 3
 
+# --- NEW: Rate limiting and adaptive concurrency ---
+BURST_SECONDS = 1.0               # Each bucket holds at most this many seconds of quota
+OUTPUT_TOKENS_ESTIMATE = 1500     # Expected response tokens per word, counted against TPM up front
+MIN_CONCURRENT = 1
+MAX_CONCURRENT_CEILING = 64       # MAX_CONCURRENT is the starting point; it adapts between these bounds
+CONCURRENCY_COOLDOWN_SECONDS = 5.0  # At most one decrease per cooldown
+LATENCY_SLOWDOWN_FACTOR = 2.0     # Back off while latency exceeds this multiple of the fastest seen
+
 # Logger setup
 LOG_FILE = Path("log_info.txt")
 logging.basicConfig(
@@ -43,90 +69,564 @@ def load_output_json(path: Path):
     if not path.exists(): return {}
     text = path.read_text(encoding="utf-8").strip()
     if not text: return {}
-    return json.loads(text)
+    return json_codec.loads(text)
 
 def write_output_json(path: Path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Written atomically: the run flushes repeatedly and may be interrupted at any point.
+    atomic_write_json(path, data)
 
 def extract_json(text: str):
     # This logic now needs to handle the AI's top-level object format
     try:
         # First, try to load the whole text as JSON
-        return json.loads(text)
+        return json_codec.loads(text)
     except Exception:
         # If that fails, find the outermost curly braces
         match = re.search(r"^\s*(\{.*?\})\s*$", text, re.DOTALL)
         if match:
             try:
-                return json.loads(match.group(1))
+                return json_codec.loads(match.group(1))
             except Exception:
                 pass
     logging.warning("Failed to extract a valid JSON object from the AI response.")
     return None
 
+def extract_output_text(data):
+    """Joins the text parts of a /v1/responses body."""
+    output_text = ""
+    if isinstance(data.get("output"), list):
+        for item in data["output"]:
+            for c in item.get("content", []):
+                if "text" in c: output_text += c["text"]
+                elif c.get("payload", {}).get("text"): output_text += c["payload"]["text"]
+    elif data.get("output_text"): output_text = data["output_text"]
+    return output_text
+
+# --- NEW: Content-addressed cache of raw responses ---
+class ResponseCache:
+    """
+    Keeps the raw body of every successful response on disk, keyed by the
+    model, a hash of the system prompt and the word. Reruns, re-imports with an
+    unchanged prompt and fixes to the parsing code replay from here instead of
+    paying for the same answer again. A changed prompt or model misses.
+    """
+
+    def __init__(self, folder, model, system_prompt):
+        self.folder = Path(folder)
+        self.model = model
+        self.prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def _path(self, word):
+        key = hashlib.sha256(f"{self.model}\0{self.prompt_hash}\0{word}".encode("utf-8")).hexdigest()
+        # Two-character fan-out keeps directories small on large runs.
+        return self.folder / key[:2] / f"{key}.json"
+
+    def get(self, word):
+        """Returns the cached raw response text for `word`, or None."""
+        try:
+            return self._path(word).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def put(self, word, raw_text):
+        atomic_write_text(self._path(word), raw_text)
+
+def dedupe_words(words):
+    """Drops repeated words (case-insensitively), keeping the first spelling and the input order."""
+    unique = {}
+    for word in words:
+        unique.setdefault(word.strip().lower(), word.strip())
+    return list(unique.values())
+
+# --- NEW: Continuous dual (requests + tokens) rate limiting ---
+class TokenBucket:
+    """
+    Refills continuously at `per_minute / 60` per second and holds at most
+    `burst_seconds` worth of quota, so there is no burst at each minute mark.
+    Amounts are reserved up front: the level may go negative, and the caller
+    waits until it would have been refilled. Waiters are served in order and
+    never poll.
+    """
+
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = monotonic()
+
+    def reserve(self, amount, now):
+        """Takes `amount` from the bucket. Returns the seconds to wait before using it."""
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount):
+        """Gives back (or, if negative, takes) quota, e.g. after the real usage is known."""
+        self.level = min(self.capacity, self.level + amount)
+
+
 class RateLimiter:
-    def __init__(self, rpm):
-        self.rpm = rpm
-        self.tokens = rpm
-        self.lock = asyncio.Lock()
-        self._last_refill = time()
-        self._refill_interval = 60.0
-
-    async def acquire(self):
-        while True:
-            async with self.lock:
-                now = time()
-                elapsed = now - self._last_refill
-                if elapsed >= self._refill_interval:
-                    self.tokens = self.rpm
-                    self._last_refill = now
-                if self.tokens > 0:
-                    self.tokens -= 1
-                    return
-            await asyncio.sleep(0.05)
-
-async def call_openai(session, system_prompt, word, rl: RateLimiter, req_id: int):
-    start_time = time()
+    """Enforces both RPM and TPM, and pauses every caller after a Retry-After."""
+
+    def __init__(self, rpm, tpm=TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._paused_until = 0.0
+
+    async def acquire(self, estimated_tokens=0):
+        # No await between reading and updating the buckets, so no lock is needed
+        # within the event loop.
+        now = monotonic()
+        wait = max(
+            self.requests.reserve(1, now),
+            self.tokens.reserve(estimated_tokens, now),
+            self._paused_until - now,
+        )
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # A Retry-After may have arrived while this caller was waiting.
+        while self._paused_until > monotonic():
+            await asyncio.sleep(self._paused_until - monotonic())
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Corrects the token bucket once the response reports the real usage."""
+        if actual_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def pause(self, seconds):
+        """Stops every caller for `seconds` (from a 429's Retry-After header)."""
+        self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+
+# --- NEW: Concurrency that adapts to 429s and latency ---
+class AdaptiveConcurrency:
+    """
+    An asyncio semaphore whose limit moves at runtime: it is halved on a 429
+    (at most once per cooldown), lowered by one while latency is well above the
+    fastest latency seen, and raised by one after `limit` fast successes once
+    the cooldown after the last decrease has passed.
+    """
+
+    def __init__(self, initial=MAX_CONCURRENT, minimum=MIN_CONCURRENT, maximum=MAX_CONCURRENT_CEILING):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._successes = 0
+        self._latency_ewma = None
+        self._best_latency = None
+        self._last_decrease = 0.0
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.minimum, min(self.maximum, limit))
+        if limit != self.limit:
+            logging.info(f"Concurrency {self.limit} -> {limit} ({reason})")
+            self.limit = limit
+            # A higher limit may let waiting callers in; wake them up.
+            asyncio.get_running_loop().create_task(self._notify())
+        self._successes = 0
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _can_decrease(self):
+        now = monotonic()
+        if now - self._last_decrease < CONCURRENCY_COOLDOWN_SECONDS:
+            return False
+        self._last_decrease = now
+        return True
+
+    def record_throttled(self):
+        if self._can_decrease():
+            self._set_limit(self.limit // 2, "rate limited")
+
+    def record_success(self, latency):
+        self._best_latency = latency if self._best_latency is None else min(self._best_latency, latency)
+        self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+        if self._latency_ewma > self._best_latency * LATENCY_SLOWDOWN_FACTOR:
+            if self._can_decrease():
+                self._set_limit(self.limit - 1, f"latency {self._latency_ewma:.1f}s")
+            return
+        if monotonic() - self._last_decrease < CONCURRENCY_COOLDOWN_SECONDS:
+            # Requests sent before the last decrease say nothing about the new limit.
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._set_limit(self.limit + 1, "fast responses")
+
+
+# --- NEW: Throughput and latency metrics ---
+class RunMetrics:
+    """
+    Collects what a run needs to size MAX_CONCURRENT and RPM: request latency
+    (the HTTP round trip only), time spent waiting on the rate limiter and for
+    a concurrency slot, retries and failures by status, tokens in/out and
+    words per second.
+    """
+
+    def __init__(self, total_words=0):
+        self.total_words = total_words
+        self.started = monotonic()
+        self.latencies = []
+        self.limiter_wait = 0.0
+        self.queue_wait = 0.0
+        self.requests = 0
+        self.retries_by_status = {}
+        self.failures_by_status = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.words_done = 0
+        self.words_answered = 0
+        self.cache_hits = 0
+
+    def record_request(self, latency, usage):
+        self.requests += 1
+        self.latencies.append(latency)
+        usage = usage or {}
+        self.input_tokens += usage.get("input_tokens") or 0
+        self.output_tokens += usage.get("output_tokens") or 0
+
+    def record_retry(self, status):
+        self.retries_by_status[str(status)] = self.retries_by_status.get(str(status), 0) + 1
+
+    def record_failure(self, status):
+        self.failures_by_status[str(status)] = self.failures_by_status.get(str(status), 0) + 1
+
+    def record_words(self, done, answered):
+        self.words_done += done
+        self.words_answered += answered
+
+    def _percentile(self, ordered, fraction):
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    def summary(self, concurrency=None):
+        elapsed = monotonic() - self.started
+        ordered = sorted(self.latencies)
+        histogram = {f"<={bound}s": 0 for bound in LATENCY_BUCKETS}
+        histogram[f">{LATENCY_BUCKETS[-1]}s"] = 0
+        for latency in ordered:
+            bound = next((b for b in LATENCY_BUCKETS if latency <= b), None)
+            histogram[f"<={bound}s" if bound is not None else f">{LATENCY_BUCKETS[-1]}s"] += 1
+        return {
+            "elapsed_seconds": round(elapsed, 2),
+            "words_total": self.total_words,
+            "words_done": self.words_done,
+            "words_answered": self.words_answered,
+            "words_per_second": round(self.words_done / elapsed, 3) if elapsed else 0.0,
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "requests_per_minute": round(self.requests / elapsed * 60, 1) if elapsed else 0.0,
+            "latency_seconds": {
+                "p50": self._percentile(ordered, 0.50),
+                "p90": self._percentile(ordered, 0.90),
+                "p99": self._percentile(ordered, 0.99),
+                "max": round(ordered[-1], 3) if ordered else None,
+                "histogram": histogram,
+            },
+            "limiter_wait_seconds": round(self.limiter_wait, 2),
+            "queue_wait_seconds": round(self.queue_wait, 2),
+            "retries_by_status": self.retries_by_status,
+            "failures_by_status": self.failures_by_status,
+            "tokens": {"input": self.input_tokens, "output": self.output_tokens},
+            "concurrency_limit": concurrency.limit if concurrency else None,
+        }
+
+    def progress_line(self, concurrency=None):
+        elapsed = monotonic() - self.started
+        rate = self.words_done / elapsed if elapsed else 0.0
+        retries = sum(self.retries_by_status.values())
+        line = (f"--- Progress: {self.words_done}/{self.total_words} words, {rate:.2f} words/s, "
+                f"{self.requests} requests, {retries} retries, "
+                f"tokens in/out {self.input_tokens}/{self.output_tokens}")
+        if concurrency:
+            line += f", concurrency {concurrency.in_flight}/{concurrency.limit}"
+        return line + " ---"
+
+
+def estimate_tokens(*texts, words=1):
+    """Rough token count of a request: ~4 characters per token plus the expected output for `words` words."""
+    return sum(len(text) for text in texts) // 4 + OUTPUT_TOKENS_ESTIMATE * words
+
+def _retry_after_seconds(headers, attempt):
+    """Reads Retry-After (seconds or an HTTP date) or retry-after-ms; falls back to exponential backoff."""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time())
+            except (TypeError, ValueError):
+                pass
+    return float(2 ** attempt)
+
+def parse_response(text):
+    """Turns a raw /v1/responses body into the AI's JSON object, or None."""
+    return extract_json(extract_output_text(json_codec.loads(text)))
+
+def _parse_cached(cached):
+    try:
+        return parse_response(cached)
+    except json_codec.DecodeError:
+        return None
+
+async def _post_prompt(session, system_prompt, prompt_user, label, rl: RateLimiter, req_id: int, concurrency, estimated_tokens, metrics=None):
+    """
+    Sends one prompt with rate limiting, retries and backoff. Returns the raw
+    response body, or None once the request has failed for good. `runtime` in
+    the log is the HTTP round trip of the last attempt, without limiter waits.
+    """
+    metrics = metrics or RunMetrics()
     retries = 0
-    await rl.acquire()
-    prompt_user = (f"Produce a single valid JSON object for the German word: \"{word}\".\n" "Follow the vocabulary metrics schema. Return only valid JSON.")
+    runtime = 0.0
     payload = {"model": MODEL, "input": [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt_user}]}
     headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
     for attempt in range(1, RETRY_LIMIT + 1):
         retries = attempt - 1
+        # Every attempt counts against the quota, so each one is rate limited.
+        wait_start = monotonic()
+        await rl.acquire(estimated_tokens)
+        metrics.limiter_wait += monotonic() - wait_start
+        attempt_start = None
         try:
-            async with session.post(OPENAI_URL, json=payload, headers=headers, timeout=60) as resp:
-                text = await resp.text()
-                runtime = time() - start_time
-                if resp.status >= 400:
-                    if resp.status in (429, 500, 502, 503, 504) and attempt < RETRY_LIMIT:
-                        await asyncio.sleep(2 ** attempt)
-                        continue
-                    logging.error(f"Word={word} ID={req_id} FAILED status={resp.status} runtime={runtime:.2f}s retries={retries}")
-                    return None
-                data = await resp.json()
-                output_text = ""
-                if isinstance(data.get("output"), list):
-                    for item in data["output"]:
-                        for c in item.get("content", []):
-                            if "text" in c: output_text += c["text"]
-                            elif c.get("payload", {}).get("text"): output_text += c["payload"]["text"]
-                elif data.get("output_text"): output_text = data["output_text"]
-                obj = extract_json(output_text)
-                if obj is None:
-                    logging.error(f"Word={word} ID={req_id} JSON_PARSE_FAILED runtime={runtime:.2f}s retries={retries}")
-                    return None
-                logging.info(f"Word={word} ID={req_id} SUCCESS runtime={runtime:.2f}s retries={retries}")
-                return obj
+            retry_delay = None
+            slot_start = monotonic()
+            async with concurrency:
+                attempt_start = monotonic()
+                metrics.queue_wait += attempt_start - slot_start
+                async with session.post(OPENAI_URL, data=json_codec.dumps_bytes(payload), headers=headers, timeout=60) as resp:
+                    text = await resp.text()
+                    runtime = monotonic() - attempt_start
+                    if resp.status >= 400:
+                        metrics.record_request(runtime, None)
+                        if resp.status in (429, 500, 502, 503, 504) and attempt < RETRY_LIMIT:
+                            metrics.record_retry(resp.status)
+                            retry_delay = _retry_after_seconds(resp.headers, attempt)
+                            if resp.status == 429:
+                                concurrency.record_throttled()
+                                rl.pause(retry_delay)
+                        else:
+                            metrics.record_failure(resp.status)
+                            logging.error(f"{label} ID={req_id} FAILED status={resp.status} runtime={runtime:.2f}s retries={retries}")
+                            return None
+                    else:
+                        concurrency.record_success(runtime)
+                        data = json_codec.loads(text)
+                        metrics.record_request(runtime, data.get("usage"))
+            if retry_delay is not None:
+                # Wait outside the concurrency slot, so backing off does not hold capacity.
+                logging.warning(f"{label} ID={req_id} status={resp.status} retrying in {retry_delay:.1f}s")
+                await asyncio.sleep(retry_delay)
+                continue
+            rl.record_usage(estimated_tokens, (data.get("usage") or {}).get("total_tokens"))
+            logging.info(f"{label} ID={req_id} RECEIVED runtime={runtime:.2f}s retries={retries}")
+            return text
         except Exception as e:
+            if attempt_start is not None:
+                runtime = monotonic() - attempt_start
             if attempt < RETRY_LIMIT:
+                metrics.record_retry("exception")
                 await asyncio.sleep(1)
                 continue
-            logging.error(f"Word={word} ID={req_id} EXCEPTION {str(e)} runtime={runtime:.2f}s retries={retries}")
+            metrics.record_failure("exception")
+            logging.error(f"{label} ID={req_id} EXCEPTION {str(e)} runtime={runtime:.2f}s retries={retries}")
             return None
     return None
 
+async def call_openai(session, system_prompt, word, rl: RateLimiter, req_id: int, concurrency=None, cache=None, metrics=None):
+    cached = cache.get(word) if cache else None
+    if cached is not None:
+        obj = _parse_cached(cached)
+        if obj is not None:
+            if metrics:
+                metrics.cache_hits += 1
+            logging.info(f"Word={word} ID={req_id} CACHED")
+            return obj
+        logging.warning(f"Word={word} ID={req_id} cached response did not parse; requesting again")
+    concurrency = concurrency or AdaptiveConcurrency()
+    prompt_user = (f"Produce a single valid JSON object for the German word: \"{word}\".\n" "Follow the vocabulary metrics schema. Return only valid JSON.")
+    text = await _post_prompt(session, system_prompt, prompt_user, f"Word={word}", rl, req_id, concurrency,
+                              estimate_tokens(system_prompt, prompt_user), metrics)
+    if text is None:
+        return None
+    if cache:
+        # Stored before parsing, so a parse failure can be fixed without paying again.
+        cache.put(word, text)
+    obj = parse_response(text)
+    if obj is None:
+        logging.error(f"Word={word} ID={req_id} JSON_PARSE_FAILED")
+        return None
+    logging.info(f"Word={word} ID={req_id} SUCCESS")
+    return obj
+
+# --- NEW: Several words per request ---
+def make_batches(words, system_prompt, words_per_request=None, token_budget=None):
+    """
+    Groups `words` into batches of at most `words_per_request` (default
+    WORDS_PER_REQUEST) whose estimated tokens stay within `token_budget`
+    (default BATCH_TOKEN_BUDGET). A batch always holds at least one word.
+    """
+    words_per_request = words_per_request or WORDS_PER_REQUEST
+    token_budget = token_budget or BATCH_TOKEN_BUDGET
+    batches, batch = [], []
+    for word in words:
+        candidate = batch + [word]
+        if batch and (len(candidate) > words_per_request
+                      or estimate_tokens(system_prompt, _batch_prompt(candidate), words=len(candidate)) > token_budget):
+            batches.append(batch)
+            candidate = [word]
+        batch = candidate
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _batch_prompt(words):
+    listed = "\n".join(f"- \"{word}\"" for word in words)
+    return (f"Process each of these German words separately:\n{listed}\n"
+            "Return one valid JSON object whose keys are exactly these input words. The value for each key is the "
+            "JSON object you would produce for that word on its own, following the vocabulary metrics schema. "
+            "Return only valid JSON.")
+
+def split_batch_result(batch_obj, words):
+    """
+    Maps each input word to its own word object from a batched answer. Keys are
+    matched case-insensitively; words the answer left out are missing.
+    """
+    if not isinstance(batch_obj, dict):
+        return {}
+    by_key = {str(key).strip().lower(): value for key, value in batch_obj.items()}
+    found = {}
+    for word in words:
+        value = by_key.get(word.strip().lower())
+        if isinstance(value, list):
+            # The AI skipped the per-word object and gave the meaning array directly.
+            value = {word: value}
+        if isinstance(value, dict) and value:
+            found[word] = value
+    return found
+
+async def call_openai_batch(session, system_prompt, words, rl: RateLimiter, req_id: int, concurrency=None, cache=None, metrics=None):
+    """
+    Enriches several words with one request. Returns ({word: word object}, outcome)
+    for the words it got an answer for; the caller re-queues the rest. `outcome` is
+    "answered", "unparsed" (the answer was not valid JSON) or "failed" (the request
+    failed for good, after its own retries). Words with a cached answer are not sent.
+    """
+    found = {}
+    if cache:
+        for word in words:
+            cached = cache.get(word)
+            obj = _parse_cached(cached) if cached is not None else None
+            if obj is not None:
+                found[word] = obj
+        if found:
+            if metrics:
+                metrics.cache_hits += len(found)
+            logging.info(f"Words={','.join(found)} ID={req_id} CACHED")
+    to_send = [word for word in words if word not in found]
+    if not to_send:
+        return found, "answered"
+    if len(to_send) == 1:
+        # A single word is sent the unbatched way, which does not retry a bad answer either.
+        obj = await call_openai(session, system_prompt, to_send[0], rl, req_id, concurrency, cache, metrics)
+        if obj is not None:
+            found[to_send[0]] = obj
+        return found, "answered" if obj is not None else "failed"
+
+    concurrency = concurrency or AdaptiveConcurrency()
+    label = f"Words={','.join(to_send)}"
+    # The whole batch body is cached too, so a parser fix replays the same batch from disk.
+    batch_key = "\n".join(to_send)
+    cached = cache.get(batch_key) if cache else None
+    batch_obj = _parse_cached(cached) if cached is not None else None
+    if batch_obj is None:
+        prompt_user = _batch_prompt(to_send)
+        text = await _post_prompt(session, system_prompt, prompt_user, label, rl, req_id, concurrency,
+                                  estimate_tokens(system_prompt, prompt_user, words=len(to_send)), metrics)
+        if text is None:
+            return found, "failed"
+        if cache:
+            cache.put(batch_key, text)
+        batch_obj = parse_response(text)
+    if batch_obj is None:
+        logging.error(f"{label} ID={req_id} JSON_PARSE_FAILED")
+        return found, "unparsed"
+    answered = split_batch_result(batch_obj, to_send)
+    for word, obj in answered.items():
+        if cache:
+            # Cached per word, in the single-word body format, so later runs can batch differently.
+            cache.put(word, json_codec.dumps({"output_text": json_codec.dumps(obj)}))
+        found[word] = obj
+    missing = [word for word in to_send if word not in answered]
+    if missing:
+        logging.warning(f"{label} ID={req_id} PARTIAL missing={','.join(missing)}")
+    logging.info(f"{label} ID={req_id} SUCCESS answered={len(answered)}/{len(to_send)}")
+    return found, "answered"
+
+def merge_ai_result(ai_response_obj, all_output_data, next_ids, changed_files):
+    """
+    Adds the word forms of one AI response to the level they belong to.
+    `next_ids` holds the next free numeric key per level. Returns the number of forms added.
+    """
+    if ai_response_obj is None or not isinstance(ai_response_obj, dict):
+        print(f"   - ⚠️  Skipping invalid or non-dict result from AI: {ai_response_obj}")
+        return 0
+
+    added = 0
+    # The AI returns a dict like {"word_form_1": [...], "word_form_2": [...]}. Iterate through it.
+    for word_form, meanings_array in ai_response_obj.items():
+        if not meanings_array or not isinstance(meanings_array, list) or 'level' not in meanings_array[0] or 'word' not in meanings_array[0]:
+            print(f"   - ⚠️  Skipping invalid meaning array for form '{word_form}': {meanings_array}")
+            continue
+
+        level = meanings_array[0]['level'].strip().lower()
+        word_str = meanings_array[0]['word'].strip()
+
+        if level not in LEVELS:
+            print(f"   - ⚠️  Skipping word '{word_str}' due to invalid level from AI: '{level}'")
+            continue
+
+        # Add the new word entry (the array of meanings) to the correct level's data
+        all_output_data[level][str(next_ids[level])] = meanings_array
+        next_ids[level] += 1
+        changed_files.add(level)
+        added += 1
+        print(f"   - ✅ Added '{word_str}' to {level.upper()} vocabulary.")
+    return added
+
+# --- NEW: Resumable runs ---
+def load_checkpoint():
+    """Returns the (lowercased) input words a previous run already got an answer for."""
+    try:
+        return set(json_codec.load_file(CHECKPOINT_FILE).get("completed", []))
+    except (json_codec.DecodeError, IOError):
+        return set()
+
+def save_checkpoint(completed_words):
+    atomic_write_json(CHECKPOINT_FILE, {"completed": sorted(completed_words)})
+
 async def main():
     if not API_KEY:
         print("ERROR: Set OPENAI_API_KEY in .env or env variables.")
@@ -156,10 +656,14 @@ async def main():
         return
         
     input_text = INPUT_FILE.read_text(encoding="utf-8").replace('\n', ',')
-    words_to_process = [w.strip() for w in input_text.split(',') if w.strip()]
+    # A word listed twice (in any casing) is only requested once
+    words_to_process = dedupe_words(w for w in input_text.split(',') if w.strip())
     
+    # Words answered in an interrupted run are skipped too, even if the AI filed them under another form
+    completed_words = load_checkpoint()
     missing_words = [
-        word for word in words_to_process if word.strip().lower() not in existing_words
+        word for word in words_to_process
+        if word.strip().lower() not in existing_words and word.strip().lower() not in completed_words
     ]
 
     if not missing_words:
@@ -168,58 +672,110 @@ async def main():
 
     print(f"\n--- Found {len(missing_words)} new words to process -> calling API... ---")
 
-    # Step 3: Call API for the missing words
-    rl = RateLimiter(RPM)
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-    
-    async def worker(word):
-        async with semaphore:
-            return await call_openai(session, system_prompt, word, rl, 0)
+    # Step 3: Call API for the missing words. Results are merged as they arrive
+    # and flushed in batches, so an interrupted run keeps what it paid for.
+    rl = RateLimiter(RPM, TPM)
+    # Replaces a fixed semaphore; starts at MAX_CONCURRENT and adapts to 429s and latency
+    concurrency = AdaptiveConcurrency(MAX_CONCURRENT)
+    cache = ResponseCache(RESPONSE_CACHE_FOLDER, MODEL, system_prompt) if RESPONSE_CACHE_FOLDER else None
+    # The next free numeric key per level, so each insert is O(1)
+    next_ids = {
+        level: max([int(k) for k in data.keys() if k.isdigit()] or [0]) + 1
+        for level, data in all_output_data.items()
+    }
+    changed_files = set()
+    pending_completed = []
+    added_words = 0
+    last_flush = time()
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [worker(word) for word in missing_words]
-        results = await asyncio.gather(*tasks)
+    def flush():
+        nonlocal last_flush
+        if changed_files:
+            print("\n--- Saving updated output files... ---")
+            for level in sorted(changed_files):
+                path = OUTPUT_FOLDER / f"output_{level}.json"
+                write_output_json(path, all_output_data[level])
+                print(f"   - Saved {path}")
+            changed_files.clear()
+        # The checkpoint is written after the output files, so it never lists a word that was not saved.
+        if pending_completed:
+            completed_words.update(pending_completed)
+            save_checkpoint(completed_words)
+            pending_completed.clear()
+        last_flush = time()
 
-    # Step 4: Process and sort the results into the correct files
-    print("\n--- Processing and sorting AI results ---")
-    changed_files = set()
-    for ai_response_obj in results:
-        if ai_response_obj is None or not isinstance(ai_response_obj, dict):
-            print(f"   - ⚠️  Skipping invalid or non-dict result from AI: {ai_response_obj}")
-            continue
+    metrics = RunMetrics(len(missing_words))
+    request_ids = count(1)
 
-        # The AI returns a dict like {"word_form_1": [...], "word_form_2": [...]}. Iterate through it.
-        for word_form, meanings_array in ai_response_obj.items():
-            if not meanings_array or not isinstance(meanings_array, list) or 'level' not in meanings_array[0] or 'word' not in meanings_array[0]:
-                print(f"   - ⚠️  Skipping invalid meaning array for form '{word_form}': {meanings_array}")
-                continue
+    async def worker(batch):
+        """
+        Returns (word, result) for every word of `batch`. Words left out of an answer
+        are re-sent together; the words of a batched answer that did not parse are
+        re-sent one per request. At most BATCH_ROUNDS rounds.
+        """
+        answers = {}
+        groups = [batch]
+        for _ in range(BATCH_ROUNDS):
+            outcomes = await asyncio.gather(*(
+                call_openai_batch(session, system_prompt, group, rl, next(request_ids), concurrency, cache, metrics)
+                for group in groups
+            ))
+            next_groups = []
+            for group, (found, outcome) in zip(groups, outcomes):
+                answers.update(found)
+                left_out = [word for word in group if word not in found]
+                if not left_out or outcome == "failed":
+                    # Done, or the HTTP request failed even after its own retries.
+                    continue
+                if outcome == "unparsed":
+                    next_groups.extend([word] for word in left_out)
+                else:
+                    next_groups.append(left_out)
+            groups = next_groups
+            if not groups:
+                break
+        return [(word, answers.get(word)) for word in batch]
 
-            level = meanings_array[0]['level'].strip().lower()
-            word_str = meanings_array[0]['word'].strip()
+    async def report_progress():
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+            print(metrics.progress_line(concurrency))
 
-            if level not in LEVELS:
-                print(f"   - ⚠️  Skipping word '{word_str}' due to invalid level from AI: '{level}'")
-                continue
-            
-            # Add the new word entry (the array of meanings) to the correct level's data
-            target_dict = all_output_data[level]
-            next_id = max([int(k) for k in target_dict.keys() if k.isdigit()] or [0]) + 1
-            target_dict[str(next_id)] = meanings_array
-            changed_files.add(level)
-            print(f"   - ✅ Added '{word_str}' to {level.upper()} vocabulary.")
-
-    # Step 5: Save all modified files
-    if not changed_files:
+    batches = make_batches(missing_words, system_prompt)
+    print(f"--- Sending {len(batches)} requests of up to {WORDS_PER_REQUEST} words ---")
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [asyncio.ensure_future(worker(batch)) for batch in batches]
+        progress_task = asyncio.ensure_future(report_progress())
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                results = await next_result
+                metrics.record_words(len(results), sum(1 for _, obj in results if obj is not None))
+                for word, ai_response_obj in results:
+                    # Step 4: Sort the result into the correct file
+                    added = merge_ai_result(ai_response_obj, all_output_data, next_ids, changed_files)
+                    if ai_response_obj is not None:
+                        # Mark the word done even if the AI gave nothing usable; a rerun would pay again for the same answer.
+                        pending_completed.append(word.strip().lower())
+                    added_words += added
+                # Step 5: Save the modified files every few results
+                if len(pending_completed) >= FLUSH_EVERY_RESULTS or time() - last_flush >= FLUSH_INTERVAL_SECONDS:
+                    flush()
+        finally:
+            # On Ctrl-C or a crash, cancel what is still in flight and keep everything that arrived.
+            for task in tasks:
+                task.cancel()
+            progress_task.cancel()
+            flush()
+            # Written even for an interrupted run; partial numbers are still useful for sizing.
+            summary = metrics.summary(concurrency)
+            atomic_write_json(METRICS_FILE, summary, pretty=True)
+            print(f"\n--- Run metrics (saved to {METRICS_FILE}) ---")
+            print(json_codec.dumps(summary, pretty=True))
+
+    if added_words == 0:
         print("\n--- No valid new words were generated by the AI. ---")
-    else:
-        print("\n--- Saving updated output files... ---")
-        for level in sorted(list(changed_files)):
-            path = OUTPUT_FOLDER / f"output_{level}.json"
-            write_output_json(path, all_output_data[level])
-            print(f"   - Saved {path}")
-            
     print("\n--- Processing finished. ---")
 
-
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import json_codec
+from stats_record import StatsRecord, to_json_value
+
+# The stats table is keyed by (level, item_key) so a save only touches the rows
+# that actually changed instead of rewriting a whole level file.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repetition_stats (
+    level    TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    stats    TEXT NOT NULL,
+    PRIMARY KEY (level, item_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS imported_levels (
+    level       TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0);
+"""
+
+# Besides the global 'version', every level has its own counter ('version:<level>'),
+# so a cache can tell which levels another writer actually changed.
+_LEVEL_VERSION_PREFIX = "version:"
+
+def _encode(stats):
+    """Serializes a StatsRecord (or a plain stats dict) to its JSON row value."""
+    return json_codec.dumps(stats, default=to_json_value)
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+_MAX_KEYS_PER_QUERY = 500
+
+
+class RepetitionStore:
+    """
+    An embedded SQLite store for per-item repetition stats.
+    Each stats dict is stored as a JSON blob in its own row.
+    """
+
+    def __init__(self, db_path, json_folder):
+        self.db_path = Path(db_path)
+        self.json_folder = Path(json_folder)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._imported_levels = set()
+
+    def _connect(self):
+        """Returns this thread's connection, creating the database on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _bump_version(self, conn, levels):
+        """
+        Increments the store version and the version of each written level inside
+        the caller's transaction. Returns the new store version.
+        """
+        level_keys = [(_LEVEL_VERSION_PREFIX + level,) for level in levels]
+        conn.executemany("INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, 0)", level_keys)
+        conn.executemany("UPDATE store_meta SET value = value + 1 WHERE key = ?", level_keys)
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+        return conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+
+    def get_version(self):
+        """
+        Returns a counter that changes on every write, from any process.
+        In-memory caches use it to detect that their copy is stale.
+        """
+        conn = self._connect()
+        return conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+
+    def get_versions(self):
+        """
+        Returns (store version, { level: level version }) read in one statement, so
+        the two are consistent. A level that was never written has no entry (version 0).
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT key, value FROM store_meta WHERE key = 'version' OR key LIKE ?",
+            (_LEVEL_VERSION_PREFIX + "%",)
+        ).fetchall()
+        versions = dict(rows)
+        level_versions = {
+            key[len(_LEVEL_VERSION_PREFIX):]: value
+            for key, value in versions.items() if key.startswith(_LEVEL_VERSION_PREFIX)
+        }
+        return versions['version'], level_versions
+
+    def get_meta(self, key, default=0):
+        """Returns an integer stored in store_meta (e.g. the last applied journal entry)."""
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def ensure_imported(self, level):
+        """
+        Runs the one-time JSON import for a level if it has not happened yet.
+        Returns True if this call checked the database (and may have written to it).
+        """
+        if level in self._imported_levels:
+            return False
+        with self._init_lock:
+            if level in self._imported_levels:
+                return False
+            self.import_json_level(level)
+            self._imported_levels.add(level)
+            return True
+
+    def import_json_level(self, level):
+        """
+        Imports `<level>_repetition.json` into the database exactly once.
+        The JSON file is left untouched so it can serve as a backup.
+        Returns the number of imported items (0 if the level was already imported).
+        """
+        json_path = self.json_folder / f"{level}_repetition.json"
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two server processes
+        # starting at once cannot both import the same level.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            already_imported = conn.execute(
+                "SELECT 1 FROM imported_levels WHERE level = ?", (level,)
+            ).fetchone()
+            if already_imported:
+                conn.rollback()
+                return 0
+
+            data = {}
+            if json_path.exists():
+                try:
+                    data = json_codec.load_file(json_path)
+                except (json_codec.DecodeError, IOError):
+                    print(f"WARNING: Could not parse {json_path}. Importing it as empty.")
+                    data = {}
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO repetition_stats (level, item_key, stats) VALUES (?, ?, ?)",
+                ((level, item_key, _encode(stats)) for item_key, stats in data.items())
+            )
+            conn.execute(
+                "INSERT INTO imported_levels (level, imported_at) VALUES (?, ?)",
+                (level, datetime.now().isoformat())
+            )
+            self._bump_version(conn, [level])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if data:
+            print(f"INFO: Imported {len(data)} items from {json_path} into {self.db_path}.")
+        return len(data)
+
+    def load(self, level, item_keys=None):
+        """
+        Returns { item_key: StatsRecord } for a level.
+        If `item_keys` is given, only those rows are read.
+        """
+        self.ensure_imported(level)
+        conn = self._connect()
+        if item_keys is None:
+            rows = conn.execute(
+                "SELECT item_key, stats FROM repetition_stats WHERE level = ?", (level,)
+            ).fetchall()
+            return {item_key: StatsRecord.from_dict(json_codec.loads(stats)) for item_key, stats in rows}
+
+        item_keys = list(dict.fromkeys(item_keys))
+        result = {}
+        for start in range(0, len(item_keys), _MAX_KEYS_PER_QUERY):
+            chunk = item_keys[start:start + _MAX_KEYS_PER_QUERY]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT item_key, stats FROM repetition_stats WHERE level = ? AND item_key IN ({placeholders})",
+                (level, *chunk)
+            ).fetchall()
+            result.update((item_key, StatsRecord.from_dict(json_codec.loads(stats))) for item_key, stats in rows)
+        return result
+
+    def upsert(self, level, items):
+        """
+        Inserts or replaces the given { item_key: stats } rows in one transaction.
+        Returns the new store version.
+        """
+        return self.upsert_levels({level: items})
+
+    def upsert_levels(self, items_by_level, meta=None):
+        """
+        Inserts or replaces { level: { item_key: stats } } rows and sets the
+        `meta` { key: int } values, all in one transaction, so a marker such as
+        the applied journal entry is durable exactly when the stats are.
+        Returns the new store version.
+        """
+        for level in items_by_level:
+            self.ensure_imported(level)
+        conn = self._connect()
+        with conn:
+            for level, items in items_by_level.items():
+                conn.executemany(
+                    "INSERT OR REPLACE INTO repetition_stats (level, item_key, stats) VALUES (?, ?, ?)",
+                    ((level, item_key, _encode(stats)) for item_key, stats in items.items())
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (meta or {}).items()
+            )
+            return self._bump_version(conn, items_by_level.keys())
+
+    def replace_level(self, level, data):
+        """Makes the stored rows for a level exactly match `data`. Returns the new store version."""
+        self.ensure_imported(level)
+        conn = self._connect()
+        with conn:
+            existing_keys = {row[0] for row in conn.execute(
+                "SELECT item_key FROM repetition_stats WHERE level = ?", (level,)
+            )}
+            stale_keys = existing_keys - data.keys()
+            conn.executemany(
+                "DELETE FROM repetition_stats WHERE level = ? AND item_key = ?",
+                ((level, item_key) for item_key in stale_keys)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO repetition_stats (level, item_key, stats) VALUES (?, ?, ?)",
+                ((level, item_key, _encode(stats)) for item_key, stats in data.items())
+            )
+            return self._bump_version(conn, [level])
+
+
+if __name__ == "__main__":
+    # Runs the one-time import explicitly, e.g. before deploying the new backend.
+    import data_manager
+    import user_state
+    for user_id in user_state.known_user_ids():
+        with user_state.use_user(user_id):
+            store = data_manager.get_repetition_store()
+            for lvl in data_manager.LEVELS:
+                count = store.import_json_level(lvl)
+                print(f"{user_id}/{lvl}: imported {count} items.")
@@ -1,10 +1,37 @@
-import json
+import copy
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from safe_io import InterProcessLock, atomic_write_json
+import json_codec
+import user_state
 
 # Centralized configuration
+# The paths are relative to the current learner's folder (see user_state.py).
 REPORT_FOLDER = Path("performance-report")
+# --- NEW: The report is partitioned by day ---
+# summary.json holds the all-time aggregates; days/<YYYY-MM-DD>.json holds one day's maps.
+SUMMARY_FILE = REPORT_FOLDER / "summary.json"
+DAYS_FOLDER = REPORT_FOLDER / "days"
+# The legacy single-file report. It is split into partitions once, then renamed.
 REPORT_FILE = REPORT_FOLDER / "repetition_report.json"
 LEVELS = ["a1", "a2", "b1"]
+MAX_CACHED_DAYS = 3  # Days whose aggregates stay in memory per learner (today, plus journal replays)
+
+# Keys whose values are { date_str: {...} } and therefore live in the day partitions.
+DAILY_KEYS = [
+    "daily_seen_words",
+    "daily_wrong_counts",
+    "daily_article_wrong_counts",
+    "daily_level_correct_counts",
+    "daily_level_wrong_counts",
+    "daily_level_article_wrong_counts",
+]
+# Keys that are not per day and live in the summary.
+SUMMARY_KEYS = ["word_learned", "category_performance"]
+# Written into the summary and a day partition with the id of the journal entry
+# they last took in, so a replayed entry does not count twice.
+JOURNAL_ID_KEY = "journal_id"
 
 # The structure of the report file
 # --- SCHEMA UPDATED ---
@@ -19,55 +46,223 @@ DEFAULT_REPORT_SCHEMA = {
     "category_performance": {},
 }
 
-def load_report_data():
-    """Loads the performance report data from its JSON file."""
-    REPORT_FOLDER.mkdir(exist_ok=True)
-    if not REPORT_FILE.exists():
-        return DEFAULT_REPORT_SCHEMA.copy()
+def _path(relative_path):
+    """Resolves a report path for the current learner."""
+    return user_state.current().path(relative_path)
+
+def _report_lock():
+    """Guards the one-time legacy split and multi-file saves across server processes."""
+    state = user_state.current()
+    return state.get_or_create("report_lock", lambda: InterProcessLock(state.path(REPORT_FOLDER) / ".report.lock"))
+
+_aggregates_lock = threading.Lock()
+
+
+def _migrate_legacy_report(data):
+    """Brings a legacy single-file report up to the current schema."""
+    # Simple validation/migration to ensure all new keys exist
+    for key, default_value in DEFAULT_REPORT_SCHEMA.items():
+        if key not in data:
+            data[key] = copy.deepcopy(default_value)
+
+    # --- NEW: Migrate old wrong_counts format to new flattened format ---
+    for key_to_migrate in ["daily_wrong_counts", "daily_article_wrong_counts"]:
+        if key_to_migrate in data:
+            for date_str, word_entries in data[key_to_migrate].items():
+                # Check if any entry follows the old format. If so, migrate the whole day's data.
+                if any(isinstance(v, dict) and 'total' in v for v in word_entries.values()):
+                    migrated_entries = {}
+                    for base_word, value in word_entries.items():
+                        if isinstance(value, dict) and 'details' in value:
+                            for item_key, count in value.get('details', {}).items():
+                                migrated_entries[item_key] = migrated_entries.get(item_key, 0) + count
+                    data[key_to_migrate][date_str] = migrated_entries
+
+    # Clean up the old, unused key if it exists
+    if "daily_correct_counts" in data:
+        del data["daily_correct_counts"]
+    return data
+
+def _ensure_partitioned():
+    """Splits the legacy repetition_report.json into partitions the first time it is seen."""
+    state = user_state.current()
+    if state.get("report_partitioned"):
+        return
+    report_file = _path(REPORT_FILE)
+    with _report_lock():
+        _path(DAYS_FOLDER).mkdir(parents=True, exist_ok=True)
+        if report_file.exists() and not _path(SUMMARY_FILE).exists():
+            try:
+                legacy_data = json_codec.load_file(report_file)
+            except (json_codec.DecodeError, IOError):
+                legacy_data = None
+            if legacy_data is not None:
+                print(f"INFO: Splitting {report_file} into daily partitions.")
+                save_report_data(_migrate_legacy_report(legacy_data))
+                report_file.rename(report_file.with_name(report_file.name + ".migrated"))
+    state.get_or_create("report_partitioned", lambda: True)
+
+def _read_json(path, default):
+    if not path.exists():
+        return default
+    try:
+        return json_codec.load_file(path)
+    except (json_codec.DecodeError, IOError):
+        return default
+
+def _day_file(date_str):
+    return _path(DAYS_FOLDER) / f"{date_str}.json"
+
+def load_day_report(date_str):
+    """
+    Loads a single day's partition as { daily_key: {...} }, e.g.
+    { "daily_seen_words": {"a1": [...]}, "daily_level_correct_counts": {"a1": 3}, ... }.
+    Only that day's file is read.
+    """
+    _ensure_partitioned()
+    day_data = _read_json(_day_file(date_str), {})
+    return {key: day_data.get(key, {}) for key in DAILY_KEYS}
+
+def load_report_data(days=None):
+    """
+    Loads the performance report in its classic { key: { date_str: ... } } shape.
+    If `days` is given, only those day partitions are read; otherwise all of them.
+    """
+    _ensure_partitioned()
+    data = copy.deepcopy(DEFAULT_REPORT_SCHEMA)
+    summary = _read_json(_path(SUMMARY_FILE), {})
+    for key in SUMMARY_KEYS:
+        if key in summary:
+            data[key] = summary[key]
+
+    if days is None:
+        days = sorted(path.stem for path in _path(DAYS_FOLDER).glob("*.json"))
+    for date_str in days:
+        if not _day_file(date_str).exists():
+            continue
+        day_data = load_day_report(date_str)
+        for key in DAILY_KEYS:
+            data[key][date_str] = day_data[key]
+    return data
+
+def load_applied_journal_ids(date_str):
+    """
+    Returns (summary_id, day_id): the last journal entry taken into the summary
+    and into the day partition of `date_str` (0 if none).
+    """
+    _ensure_partitioned()
+    summary = _read_json(_path(SUMMARY_FILE), {})
+    day_data = _read_json(_day_file(date_str), {})
+    return summary.get(JOURNAL_ID_KEY, 0), day_data.get(JOURNAL_ID_KEY, 0)
+
+def save_report_data(data, updated_aggregates=(), journal_id=None, write_summary=True, days=None):
+    """
+    Saves the performance report data. The summary is written unless
+    `write_summary` is False; the day partitions present in `data` are written
+    (only those in `days`, if given), so a report loaded for a single day
+    rewrites just that day's file.
+    Every file is replaced atomically, so concurrent readers never see a torn file.
+    `updated_aggregates` lists the days whose cached DayAggregates were already
+    updated along with `data`; the aggregates of any other written day are rebuilt.
+    `journal_id` is recorded in every file written (see load_applied_journal_ids).
+    """
+    marker = {JOURNAL_ID_KEY: journal_id} if journal_id is not None else {}
+    with _report_lock():
+        _path(DAYS_FOLDER).mkdir(parents=True, exist_ok=True)
+        if write_summary:
+            atomic_write_json(_path(SUMMARY_FILE), {**{key: data.get(key, {}) for key in SUMMARY_KEYS}, **marker})
+
+        dates = set()
+        for key in DAILY_KEYS:
+            dates.update(data.get(key, {}).keys())
+        if days is not None:
+            dates &= set(days)
+        for date_str in dates:
+            atomic_write_json(_day_file(date_str), {
+                **{key: data.get(key, {}).get(date_str, {}) for key in DAILY_KEYS}, **marker
+            })
+            if date_str in updated_aggregates:
+                _commit_day_aggregates(date_str)
+            else:
+                discard_day_aggregates(date_str)
+
+
+# --- NEW: Incrementally maintained daily aggregates ---
+class DayAggregates:
+    """
+    Running totals of one day, kept next to the day partition so the hot reads
+    (/api/report/today, /api/report/today_stats, the new-word quota) do not
+    re-scan the day's lists. report_updater updates them at write time.
+    """
+    __slots__ = ("seen", "practiced", "correct_by_level", "wrong_by_level")
+
+    def __init__(self, day_data):
+        self.seen = {lvl: set(item_keys) for lvl, item_keys in day_data.get("daily_seen_words", {}).items()}
+        self.practiced = sum(len(item_keys) for item_keys in self.seen.values())
+        self.correct_by_level = dict(day_data.get("daily_level_correct_counts", {}))
+        self.wrong_by_level = dict(day_data.get("daily_level_wrong_counts", {}))
+
+    def was_seen(self, item_key):
+        return any(item_key in item_keys for item_keys in self.seen.values())
+
+    def seen_count(self, level):
+        item_keys = self.seen.get(level)
+        return len(item_keys) if item_keys else 0
+
+    def mark_seen(self, level, item_key):
+        """Adds an item to the day's seen set. Returns True if it was not seen yet."""
+        item_keys = self.seen.setdefault(level, set())
+        if item_key in item_keys:
+            return False
+        item_keys.add(item_key)
+        self.practiced += 1
+        return True
+
+def _day_signature(date_str):
+    """(mtime_ns, size) of a day partition, or None if it does not exist yet."""
     try:
-        with open(REPORT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # --- VALIDATION LOGIC UPDATED ---
-            # Simple validation/migration to ensure all new keys exist
-            if "word_learned" not in data:
-                data["word_learned"] = {level: {} for level in LEVELS}
-            if "daily_seen_words" not in data:
-                data["daily_seen_words"] = {}
-            if "daily_wrong_counts" not in data:
-                data["daily_wrong_counts"] = {}
-            if "daily_article_wrong_counts" not in data:
-                data["daily_article_wrong_counts"] = {}
-            if "daily_level_correct_counts" not in data:
-                data["daily_level_correct_counts"] = {}
-            if "daily_level_wrong_counts" not in data:
-                data["daily_level_wrong_counts"] = {}
-            if "category_performance" not in data:
-                data["category_performance"] = {}
-            if "daily_level_article_wrong_counts" not in data:
-                data["daily_level_article_wrong_counts"] = {}
-
-            # --- NEW: Migrate old wrong_counts format to new flattened format ---
-            for key_to_migrate in ["daily_wrong_counts", "daily_article_wrong_counts"]:
-                if key_to_migrate in data:
-                    for date_str, word_entries in data[key_to_migrate].items():
-                        # Check if any entry follows the old format. If so, migrate the whole day's data.
-                        if any(isinstance(v, dict) and 'total' in v for v in word_entries.values()):
-                            migrated_entries = {}
-                            for base_word, value in word_entries.items():
-                                if isinstance(value, dict) and 'details' in value:
-                                    for item_key, count in value.get('details', {}).items():
-                                        migrated_entries[item_key] = migrated_entries.get(item_key, 0) + count
-                            data[key_to_migrate][date_str] = migrated_entries
-
-            # Clean up the old, unused key if it exists
-            if "daily_correct_counts" in data:
-                del data["daily_correct_counts"]
-            return data
-    except (json.JSONDecodeError, IOError):
-        return DEFAULT_REPORT_SCHEMA.copy()
-
-def save_report_data(data):
-    """Saves the performance report data to its JSON file."""
-    REPORT_FOLDER.mkdir(exist_ok=True)
-    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+        st = _day_file(date_str).stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _cached_days():
+    return user_state.current().get_or_create("report_day_aggregates", OrderedDict)
+
+def load_day_aggregates(date_str, day_data=None):
+    """
+    Returns the DayAggregates of a day. They are built from the day partition
+    once and then kept in memory; a stat() call detects writes by other server
+    processes, which trigger a rebuild. Pass `day_data` (as returned by
+    load_day_report) if it is already loaded, to skip re-reading the file.
+    """
+    _ensure_partitioned()
+    cached_days = _cached_days()
+    signature = _day_signature(date_str)
+    with _aggregates_lock:
+        cached = cached_days.get(date_str)
+        if cached is not None and cached[0] == signature:
+            cached_days.move_to_end(date_str)
+            return cached[1]
+    aggregates = DayAggregates(day_data if day_data is not None else load_day_report(date_str))
+    with _aggregates_lock:
+        cached_days[date_str] = (signature, aggregates)
+        cached_days.move_to_end(date_str)
+        while len(cached_days) > MAX_CACHED_DAYS:
+            cached_days.popitem(last=False)
+    return aggregates
+
+def discard_day_aggregates(date_str):
+    """Drops a day's cached aggregates, e.g. after a failed save left them ahead of the file."""
+    with _aggregates_lock:
+        _cached_days().pop(date_str, None)
+
+def _commit_day_aggregates(date_str):
+    """
+    Called after our own write of a day partition: the cached aggregates were
+    already updated in memory, so only their signature moves to the new file.
+    """
+    with _aggregates_lock:
+        cached_days = _cached_days()
+        if date_str in cached_days:
+            cached_days[date_str] = (_day_signature(date_str), cached_days[date_str][1])
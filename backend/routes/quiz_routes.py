@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 import data_manager
 from logic import quiz_selector
+from services import session_service
 from cache import get_word_to_level_map
 
 quiz_bp = Blueprint('quiz_bp', __name__)
@@ -19,6 +20,33 @@ def get_word_details(level):
 
     return jsonify(selection_result)
 
+# --- NEW: Prefetched quiz sessions ---
+@quiz_bp.route('/api/session/<level>', methods=['POST'])
+def start_quiz_session(level):
+    """
+    Selects several quiz rounds in one pass and returns the first one, with the
+    stats of its words. The remaining rounds are served by the endpoint below.
+    """
+    if level not in data_manager.LEVELS:
+        return jsonify({"error": "Invalid level specified"}), 400
+
+    data = request.get_json(silent=True) or {}
+    try:
+        rounds = int(data.get('rounds', session_service.DEFAULT_SESSION_ROUNDS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'rounds' must be a number"}), 400
+
+    return jsonify(session_service.start_session(level, rounds))
+
+@quiz_bp.route('/api/session/<session_id>/next', methods=['POST'])
+def next_quiz_round(session_id):
+    """Advances the session to its next round (hence POST) and returns it."""
+    round_data = session_service.next_round(session_id)
+    if round_data is None:
+        # Unknown, expired or used up: the client starts a new session.
+        return jsonify({"error": "Quiz session not found or finished"}), 404
+    return jsonify(round_data)
+
 @quiz_bp.route('/api/stats', methods=['POST'])
 def get_stats():
     data = request.json
@@ -32,8 +60,9 @@ def get_stats():
     if level not in data_manager.LEVELS:
         return jsonify({"error": "Invalid level specified"}), 400
 
-    all_repetition_stats = data_manager.load_repetition_stats(level)
+    all_repetition_stats = data_manager.load_repetition_stats(level, item_keys_to_lookup)
         
-    stats_to_return = {key: all_repetition_stats.get(key, {}) for key in item_keys_to_lookup}
+    # StatsRecords are converted to plain dicts for the JSON response.
+    stats_to_return = {key: dict(all_repetition_stats.get(key, {})) for key in item_keys_to_lookup}
             
     return jsonify(stats_to_return)
\ No newline at end of file
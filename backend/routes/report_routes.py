@@ -2,38 +2,36 @@ from flask import Blueprint, jsonify
 from datetime import datetime
 import data_manager
 import report_manager
-from cache import get_word_details_map
+from cache import get_item_details
+from .versioning import versioned_response
 
 report_bp = Blueprint('report_bp', __name__)
 
 # --- THIS ENDPOINT IS NOW MODIFIED ---
 @report_bp.route('/api/report/today', methods=['GET'])
+@versioned_response
 def get_today_practiced_count():
     """
     Calculates the total number of UNIQUE words (new or review)
     that the user has practiced today.
     """
-    report_data = report_manager.load_report_data()
     today_str = datetime.now().strftime('%Y-%m-%d')
-    
-    # Get the dictionary for today, which looks like: {"a1": ["word1"], "b1": ["word2", "word3"]}
-    seen_today_data = report_data.get('daily_seen_words', {}).get(today_str, {})
-    
-    # Sum the number of words in each level's list
-    total_practiced = sum(len(words) for words in seen_today_data.values())
+    # The number of unique item_keys seen today is kept as a running total
+    total_practiced = report_manager.load_day_aggregates(today_str).practiced
         
     # Return with a more descriptive key
     return jsonify({"practiced_today": total_practiced})
 
 
 @report_bp.route('/api/report/today_stats', methods=['GET'])
+@versioned_response
 def get_today_accuracy_stats():
     """Returns today's correct and wrong counts, broken down by level."""
-    report_data = report_manager.load_report_data()
     today_str = datetime.now().strftime('%Y-%m-%d')
+    today_aggregates = report_manager.load_day_aggregates(today_str)
     
-    correct_by_level = report_data.get('daily_level_correct_counts', {}).get(today_str, {})
-    wrong_by_level = report_data.get('daily_level_wrong_counts', {}).get(today_str, {})
+    correct_by_level = dict(today_aggregates.correct_by_level)
+    wrong_by_level = dict(today_aggregates.wrong_by_level)
     
     return jsonify({
         "correct_by_level": correct_by_level,
@@ -42,6 +40,7 @@ def get_today_accuracy_stats():
 
 # --- NEW ENDPOINT FOR THE DAILY DEBRIEF ---
 @report_bp.route('/api/report/daily_debrief/<level>', methods=['GET'])
+@versioned_response
 def get_daily_debrief(level):
     """
     Analyzes all words practiced today for a given level and categorizes them
@@ -51,21 +50,22 @@ def get_daily_debrief(level):
         return jsonify({"error": "Invalid level specified"}), 400
 
     # 1. Load all necessary data
-    report_data = report_manager.load_report_data()
-    repetition_stats = data_manager.load_repetition_stats(level)
-    word_details_map = get_word_details_map()
     today_str = datetime.now().strftime('%Y-%m-%d')
+    today_report = report_manager.load_day_report(today_str)
 
     # 2. Get the list of item_keys seen today for this level
-    seen_today_by_level = report_data.get('daily_seen_words', {}).get(today_str, {})
+    seen_today_by_level = today_report['daily_seen_words']
     item_keys_for_level = seen_today_by_level.get(level, [])
 
     if not item_keys_for_level:
         return jsonify({"mastered": [], "progress": [], "tricky": []})
 
+    # Only the stats of today's items are needed
+    repetition_stats = data_manager.load_repetition_stats(level, item_keys_for_level)
+
     # 3. Get today's error records for efficient lookup
-    wrong_counts_today = report_data.get('daily_wrong_counts', {}).get(today_str, {})
-    article_wrong_counts_today = report_data.get('daily_article_wrong_counts', {}).get(today_str, {})
+    wrong_counts_today = today_report['daily_wrong_counts']
+    article_wrong_counts_today = today_report['daily_article_wrong_counts']
 
     # 4. Initialize result lists
     mastered_today = []
@@ -74,10 +74,8 @@ def get_daily_debrief(level):
 
     # 5. Categorize each word
     for item_key in item_keys_for_level:
-        base_word = item_key.split('#')[0]
-        
         # Combine word details with its current repetition stats
-        details = next((m for m in word_details_map.get(base_word, []) if f"{base_word}#{m['meaning']}" == item_key), None)
+        details = get_item_details(item_key)
         stats = repetition_stats.get(item_key, {})
         
         if not details:
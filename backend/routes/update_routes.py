@@ -1,14 +1,26 @@
 from flask import Blueprint, jsonify, request
 import data_manager
-from services import quiz_service # <-- IMPORT THE NEW SERVICE
+from logic.word_updater import RESULT_TYPES
+from services import journal_service
 
 update_bp = Blueprint('update_bp', __name__)
 
+def _invalid_result(result):
+    """Returns why a single quiz result cannot be processed, or None if it is valid."""
+    if not isinstance(result, dict):
+        return "each result must be an object"
+    item_key = result.get('word')
+    if not isinstance(item_key, str) or '#' not in item_key:
+        return f"'word' must be an item_key like 'word#meaning', got {item_key!r}"
+    if result.get('result_type') not in RESULT_TYPES:
+        return f"'result_type' must be one of {', '.join(RESULT_TYPES)}, got {result.get('result_type')!r}"
+    return None
+
 @update_bp.route('/api/update', methods=['POST'])
 def update_words():
     """
-    A thin controller that handles the HTTP request and delegates
-    the business logic to the quiz_service.
+    A thin controller that durably journals the results and returns immediately.
+    The journal_service compacts them into the stats and report in the background.
     """
     data = request.json
     results = data.get('results', [])
@@ -21,11 +33,19 @@ def update_words():
     if not results:
         return jsonify({"status": "success", "message": "No results to process."})
 
-    # 2. Delegate to the service layer
+    # A journaled result is replayed later, where it can no longer be rejected; check it now.
+    if not isinstance(results, list):
+        return jsonify({"error": "'results' must be a list"}), 400
+    for index, result in enumerate(results):
+        problem = _invalid_result(result)
+        if problem:
+            return jsonify({"error": f"Invalid result at index {index}: {problem}"}), 400
+
+    # 2. Journal the batch; the background compactor folds it into the stats
     try:
-        quiz_service.process_quiz_results(results)
-        return jsonify({"status": "success", "message": f"Updated {len(results)} words."})
+        journal_service.append_results(results, level)
+        return jsonify({"status": "success", "message": f"Queued {len(results)} words."}), 202
     except Exception as e:
-        # Basic error handling for any issues in the service layer
-        print(f"ERROR: An error occurred during quiz processing: {e}")
+        # Basic error handling for any issues while journaling
+        print(f"ERROR: An error occurred while journaling quiz results: {e}")
         return jsonify({"error": "An internal error occurred while processing the results."}), 500
\ No newline at end of file
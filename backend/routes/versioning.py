@@ -0,0 +1,34 @@
+import functools
+from datetime import datetime
+from flask import make_response, request
+import data_manager
+import user_state
+
+# --- NEW: Conditional GETs for polled, read-only endpoints ---
+# The ETag combines the learner, their data version and the day (day-based
+# views such as "today" change at midnight without any write).
+
+def _current_etag():
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    return f"{user_state.current_user_id()}-{data_manager.get_data_version()}-{today_str}"
+
+def versioned_response(view):
+    """
+    Decorates a GET view whose response only depends on the learner's stats and
+    report. A matching If-None-Match is answered with 304 without calling the view.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = _current_etag()
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Let browsers keep the body but revalidate on every poll.
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.add("X-User-Id")
+        return response
+    return wrapper
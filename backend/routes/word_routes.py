@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request
 import data_manager
-from cache import get_word_details_map
+from cache import get_item_details
 
 word_bp = Blueprint('word_bp', __name__)
 
@@ -18,30 +18,28 @@ def toggle_star_status():
         return jsonify({"error": "Missing or invalid 'item_key' or 'is_starred' status"}), 400
 
     # 2. Determine the word's correct level using the cache
-    word_details_map = get_word_details_map()
-    base_word, meaning_str = item_key.split('#', 1)
-    
-    word_lvl = None
-    meanings_array = word_details_map.get(base_word)
-    if meanings_array:
-        meaning_str_stripped = meaning_str.strip()
-        correct_meaning_obj = next((m for m in meanings_array if m['meaning'].strip() == meaning_str_stripped), None)
-        if correct_meaning_obj:
-            word_lvl = correct_meaning_obj.get('level', '').lower()
+    correct_meaning_obj = get_item_details(item_key)
+    word_lvl = correct_meaning_obj.get('level', '').lower() if correct_meaning_obj else None
 
     if not word_lvl or word_lvl not in data_manager.LEVELS:
         return jsonify({"error": f"Could not determine a valid level for item_key '{item_key}'"}), 404
 
     # 3. Load, update, and save the repetition stats
     try:
-        repetition_stats = data_manager.load_repetition_stats(word_lvl)
-        
-        # Get existing stats or create a new entry if it's the first interaction
-        word_data = repetition_stats.setdefault(item_key, data_manager.get_new_repetition_schema())
-        
-        word_data['is_starred'] = bool(new_status)
-        
-        data_manager.save_repetition_stats(word_lvl, repetition_stats)
+        # Hold the single-writer lock so a concurrent compaction (in any worker)
+        # cannot interleave with this load-modify-save.
+        with data_manager.get_stats_write_lock():
+            repetition_stats = data_manager.load_repetition_stats(word_lvl, [item_key])
+            
+            # Get existing stats or create a new entry if it's the first interaction
+            word_data = repetition_stats.setdefault(item_key, data_manager.get_new_repetition_schema())
+            
+            word_data['is_starred'] = bool(new_status)
+            
+            data_manager.save_repetition_stats(word_lvl, repetition_stats, changed_keys=[item_key])
+            # Flush before releasing the lock so other workers see the change
+            data_manager.flush_repetition_stats()
+            data_manager.bump_data_version()
         
         return jsonify({
             "status": "success",
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+import json_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class InterProcessLock:
+    """
+    A re-entrant lock that is held across threads AND processes.
+    Threads of one process queue on an RLock; the holder then takes an exclusive
+    OS-level lock on `path`, so several server workers coordinate their writes.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                handle = open(self.path, 'a+b')
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                else:
+                    handle.seek(0)
+                    # LK_LOCK retries for ~10 seconds before raising; keep waiting.
+                    while True:
+                        try:
+                            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue
+                self._handle = handle
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            handle, self._handle = self._handle, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                handle.close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def atomic_write_bytes(path, payload):
+    """
+    Writes `payload` to a temp file next to `path`, fsyncs it and renames it over
+    `path`. Readers see either the old or the new content, never a torn file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates private files; keep the permissions the file had (or the usual 0644).
+        os.chmod(tmp_name, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+def atomic_write_text(path, text):
+    """Atomically saves `text` as UTF-8 (see `atomic_write_bytes`)."""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def atomic_write_json(path, data, pretty=None):
+    """
+    Atomically saves `data` as JSON (see `atomic_write_bytes`). It is compact
+    unless json_codec.COMPACT_STORAGE is off or `pretty` is given.
+    """
+    atomic_write_bytes(path, json_codec.dumps_for_storage(data, pretty))
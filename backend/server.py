@@ -1,8 +1,29 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from cache import get_word_to_level_map, get_word_details_map # <-- IMPORT NEW FUNCTION
+import json_codec
+import user_state
+
+# --- NEW: Request and response bodies go through json_codec (orjson when installed) ---
+class CodecJSONProvider(DefaultJSONProvider):
+    compact = True      # Responses stay compact in debug mode too
+    sort_keys = False   # Keys keep their insertion order; sorting costs time on every response
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj, pretty=bool(kwargs.get("indent")), default=self.default)
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            json_codec.dumps_bytes(obj, default=self.default) + b"\n", mimetype=self.mimetype
+        )
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 CORS(app)
 
 # --- Import and Register Blueprints ---
@@ -10,12 +31,38 @@ from routes.quiz_routes import quiz_bp
 from routes.update_routes import update_bp
 from routes.report_routes import report_bp
 from routes.word_routes import word_bp # <-- IMPORT NEW BLUEPRINT
+from services import journal_service
 
 app.register_blueprint(quiz_bp)
 app.register_blueprint(update_bp)
 app.register_blueprint(report_bp)
 app.register_blueprint(word_bp) # <-- REGISTER NEW BLUEPRINT
 
+# --- NEW: Every request works for one learner ---
+# The learner is chosen with the X-User-Id header (or a ?user= query parameter);
+# requests without one use the default learner and its top-level data folders.
+USER_ID_HEADER = "X-User-Id"
+
+@app.before_request
+def select_user():
+    user_id = request.headers.get(USER_ID_HEADER) or request.args.get('user') or user_state.DEFAULT_USER_ID
+    if not user_state.is_valid_user_id(user_id):
+        return jsonify({"error": "Invalid user id. Use 1-64 letters, digits, '-' or '_'."}), 400
+    g.user_context = user_state.use_user(user_id)
+    g.user_context.__enter__()
+
+@app.teardown_request
+def release_user(exc):
+    user_context = g.pop('user_context', None)
+    if user_context is not None:
+        user_context.__exit__(None, None, None)
+
+# --- NEW: Reads must see every journaled result, even ones not compacted yet ---
+@app.before_request
+def replay_pending_results():
+    if request.endpoint != 'update_bp.update_words' and journal_service.has_pending():
+        journal_service.compact_pending()
+
 # --- Optional: A simple root endpoint to confirm the server is running ---
 @app.route('/')
 def index():
@@ -24,4 +71,5 @@ def index():
 if __name__ == '__main__':
     get_word_to_level_map()  # Prime the cache on server start
     get_word_details_map()   # <-- NEW: Prime the details cache
+    journal_service.compact_all_pending(user_state.known_user_ids())  # Replay results left over from a crash
     app.run(debug=True, port=5000)
\ No newline at end of file
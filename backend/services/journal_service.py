@@ -0,0 +1,227 @@
+import atexit
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+import data_manager
+import json_codec
+from safe_io import InterProcessLock, atomic_write_json
+import user_state
+from services import quiz_service
+
+# Centralized configuration for the result journal
+# The paths are relative to the current learner's folder (see user_state.py).
+JOURNAL_FOLDER = Path("result-journal")
+JOURNAL_FILE = JOURNAL_FOLDER / "results.jsonl"
+CHECKPOINT_FILE = JOURNAL_FOLDER / "checkpoint.json"
+DEAD_LETTER_FILE = JOURNAL_FOLDER / "dead_letter.jsonl"  # Entries that kept failing, kept for inspection
+COMPACTION_INTERVAL_SECONDS = 2.0
+MAX_COMPACTION_ATTEMPTS = 3  # Failed runs before an entry is moved to the dead-letter file
+
+_compactor_start_lock = threading.Lock()
+# Learners that journaled results the background compactor has not folded in yet
+_pending_users = set()
+_pending_users_lock = threading.Lock()
+_wake_event = threading.Event()
+_stop_event = threading.Event()
+_compactor_thread = None
+
+
+def _path(relative_path):
+    return user_state.current().path(relative_path)
+
+# Appends and compaction runs are serialized independently, so a slow
+# compaction never blocks /api/update from journaling a new batch. Both locks
+# work across server processes; compaction uses the stats single-writer lock.
+def _append_lock():
+    state = user_state.current()
+    return state.get_or_create("journal_append_lock", lambda: InterProcessLock(state.path(JOURNAL_FOLDER) / ".journal.lock"))
+
+def _compaction_lock():
+    return data_manager.get_stats_write_lock()
+
+def _read_entries():
+    """Reads all journal entries, ignoring a torn last line left by a crash."""
+    journal_file = _path(JOURNAL_FILE)
+    if not journal_file.exists():
+        return []
+    entries = []
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json_codec.loads(line))
+            except json_codec.DecodeError:
+                print(f"WARNING: Skipping unreadable journal line in {journal_file}.")
+    return entries
+
+def _read_checkpoint_data():
+    checkpoint_file = _path(CHECKPOINT_FILE)
+    if not checkpoint_file.exists():
+        return {}
+    try:
+        return json_codec.load_file(checkpoint_file)
+    except (json_codec.DecodeError, IOError):
+        print(f"WARNING: Could not read {checkpoint_file}. Replaying the whole journal.")
+        return {}
+
+def _read_checkpoint():
+    """Returns the id of the last entry folded into the snapshots (0 if none)."""
+    return _read_checkpoint_data().get('last_compacted_id', 0)
+
+def _read_failed_attempts():
+    """Returns { entry_id: failed compaction runs } for the entry currently failing."""
+    return {int(entry_id): attempts for entry_id, attempts in _read_checkpoint_data().get('failed_attempts', {}).items()}
+
+def _write_checkpoint(entry_id, failed_attempts=None):
+    """
+    Atomically records the id of the last entry folded into the snapshots and,
+    optionally, how often the next entry has failed so far.
+    """
+    checkpoint = {'last_compacted_id': entry_id}
+    if failed_attempts:
+        checkpoint['failed_attempts'] = failed_attempts
+    atomic_write_json(_path(CHECKPOINT_FILE), checkpoint, pretty=False)
+
+def _dead_letter(entry, error):
+    """Appends an entry that cannot be compacted to the dead-letter file, with the error."""
+    print(f"ERROR: Journal entry {entry['id']} failed {MAX_COMPACTION_ATTEMPTS} times; "
+          f"moving it to {_path(DEAD_LETTER_FILE)}.")
+    record = {**entry, 'error': f"{type(error).__name__}: {error}", 'dead_lettered_at': datetime.now().isoformat()}
+    with open(_path(DEAD_LETTER_FILE), 'a', encoding='utf-8') as f:
+        f.write(json_codec.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def has_pending():
+    """
+    Returns True if some journaled results may not have been compacted yet.
+    The journal is emptied after every complete compaction, so this is a stat() call.
+    """
+    try:
+        return _path(JOURNAL_FILE).stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+def append_results(results, level=None):
+    """
+    Durably appends a batch of quiz results to the current learner's journal and
+    wakes the compactor. Returns the id of the new journal entry.
+    """
+    with _append_lock():
+        _path(JOURNAL_FOLDER).mkdir(parents=True, exist_ok=True)
+        # Other processes append too, so the next id is derived from disk. The
+        # journal only holds entries that are not compacted yet, so this is cheap.
+        last_id = max((entry.get('id', 0) for entry in _read_entries()), default=0)
+        entry = {
+            'id': max(last_id, _read_checkpoint()) + 1,
+            'received_at': datetime.now().isoformat(),
+            'today_str': datetime.now().strftime('%Y-%m-%d'),
+            'level': level,
+            'results': results,
+        }
+        with open(_path(JOURNAL_FILE), 'a', encoding='utf-8') as f:
+            f.write(json_codec.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    with _pending_users_lock:
+        _pending_users.add(user_state.current_user_id())
+    start_compactor()
+    _wake_event.set()
+    return entry['id']
+
+def compact_pending():
+    """
+    Folds every pending journal entry of the current learner into their stats
+    and report snapshots. Returns the number of entries compacted.
+    """
+    with _compaction_lock():
+        if not has_pending():
+            return 0
+
+        last_compacted_id = _read_checkpoint()
+        failed_attempts = _read_failed_attempts()
+        pending_entries = [e for e in _read_entries() if e.get('id', 0) > last_compacted_id]
+        pending_entries.sort(key=lambda e: e['id'])
+
+        compacted = 0
+        for entry in pending_entries:
+            try:
+                # The stats reach the store in one transaction with the entry id,
+                # and the report files carry it too, so replaying an entry that was
+                # applied before a crash changes nothing.
+                quiz_service.process_quiz_results(
+                    entry.get('results', []), today_str=entry.get('today_str'), journal_id=entry['id']
+                )
+            except Exception as e:
+                attempts = failed_attempts.get(entry['id'], 0) + 1
+                print(f"ERROR: Failed to compact journal entry {entry['id']} (attempt {attempts}): {e}")
+                if attempts < MAX_COMPACTION_ATTEMPTS:
+                    # Leave the entry pending; it is retried on the next compaction run.
+                    _write_checkpoint(last_compacted_id, {entry['id']: attempts})
+                    break
+                # It keeps failing: set it aside so the entries after it are not stuck behind it.
+                _dead_letter(entry, e)
+            _write_checkpoint(entry['id'])
+            last_compacted_id = entry['id']
+            compacted += 1
+
+        # Once everything is folded in, the journal can start over from empty.
+        with _append_lock():
+            if all(e.get('id', 0) <= last_compacted_id for e in _read_entries()):
+                open(_path(JOURNAL_FILE), 'w', encoding='utf-8').close()
+
+        return compacted
+
+def compact_all_pending(user_ids=None):
+    """
+    Compacts the journals of several learners (by default: everyone who
+    journaled results since the last run). Returns the number of entries compacted.
+    """
+    if user_ids is None:
+        with _pending_users_lock:
+            user_ids = list(_pending_users)
+            _pending_users.clear()
+    compacted = 0
+    for user_id in user_ids:
+        try:
+            with user_state.use_user(user_id):
+                compacted += compact_pending()
+        except Exception as e:
+            print(f"ERROR: Background compaction for user '{user_id}' failed: {e}")
+            # Keep the learner queued so the next run retries.
+            with _pending_users_lock:
+                _pending_users.add(user_id)
+    return compacted
+
+def _run_compactor(interval):
+    while not _stop_event.is_set():
+        _wake_event.wait(interval)
+        _wake_event.clear()
+        if _stop_event.is_set():
+            break
+        compact_all_pending()
+
+def _stop_compactor():
+    """Lets a compaction run in progress finish before the interpreter exits."""
+    _stop_event.set()
+    _wake_event.set()
+    if _compactor_thread is not None:
+        _compactor_thread.join(timeout=30)
+
+def start_compactor(interval=COMPACTION_INTERVAL_SECONDS):
+    """Starts the background compaction thread once per process."""
+    global _compactor_thread
+    if _compactor_thread is not None and _compactor_thread.is_alive():
+        return
+    with _compactor_start_lock:
+        if _compactor_thread is not None and _compactor_thread.is_alive():
+            return
+        _compactor_thread = threading.Thread(
+            target=_run_compactor, args=(interval,), name="journal-compactor", daemon=True
+        )
+        _compactor_thread.start()
+        atexit.register(_stop_compactor)
@@ -1,56 +1,94 @@
 from datetime import datetime
 import data_manager
 import report_manager
-from cache import get_word_to_level_map, get_word_details_map
-from logic import word_updater, report_updater
+from cache import get_item_details
+from logic import word_updater, report_updater, due_index
 
-def process_quiz_results(results):
+def process_quiz_results(results, today_str=None, journal_id=None):
     """
     Handles the core business logic of processing quiz results.
     This function is self-contained and can be tested independently of the web server.
+    `today_str` lets journaled results be credited to the day they were submitted.
+
+    With `journal_id` the batch is applied at most once: the day partition and
+    the summary record the id when they are written, and the stats are written
+    last, in one transaction with the id. A replay after a crash skips whatever
+    already has it. Returns False if the batch had already been applied.
     """
-    # 1. Load all necessary data and state
-    all_level_data = {lvl: data_manager.load_repetition_stats(lvl) for lvl in data_manager.LEVELS}
-    report_data = report_manager.load_report_data()
-    today_str = datetime.now().strftime('%Y-%m-%d')
-    report_data['today_str'] = today_str # Add temporarily for processing
+    with data_manager.hold_stats_flushes():
+        if journal_id is not None:
+            if data_manager.get_applied_journal_id() >= journal_id:
+                return False
+            # Earlier writes go out on their own, so only this batch is unflushed below.
+            data_manager.flush_repetition_stats()
+        try:
+            _apply_quiz_results(results, today_str, journal_id)
+        except Exception:
+            if journal_id is not None:
+                # A retry must start from the stored stats, not from this attempt's changes.
+                data_manager.discard_unflushed_stats()
+            raise
+    return True
 
-    # 2. Access cached data for efficient lookups
-    word_level_map = get_word_to_level_map()
-    word_details_map = get_word_details_map()
+def _apply_quiz_results(results, today_str, journal_id):
+    # 1. Load the report
+    today_str = today_str or datetime.now().strftime('%Y-%m-%d')
+    summary_done = day_done = False
+    if journal_id is not None:
+        summary_id, day_id = report_manager.load_applied_journal_ids(today_str)
+        summary_done, day_done = summary_id >= journal_id, day_id >= journal_id
+    # Only today's partition is read and rewritten
+    report_data = report_manager.load_report_data(days=[today_str])
+    report_data['today_str'] = today_str # Add temporarily for processing
+    # The day's running totals, built from the partition just read if they are not cached.
+    # If the partition already holds this batch, its totals are not touched.
+    day_aggregates = None if day_done else report_manager.load_day_aggregates(
+        today_str, {key: report_data[key].get(today_str, {}) for key in report_manager.DAILY_KEYS}
+    )
 
     daily_wrong_counts_today = report_data.get('daily_wrong_counts', {}).get(today_str, {})
 
-    # 3. Process each result from the quiz
+    # 2. Determine the correct level for each specific word-meaning pair
+    resolved_results = []
     for result in results:
         item_key = result.get('word')
         if not item_key or '#' not in item_key:
             continue
 
-        base_word, meaning_str = item_key.split('#', 1)
-        
-        # Determine the correct level for the specific word-meaning pair
-        word_lvl = None
-        meanings_array = word_details_map.get(base_word)
-        if meanings_array:
-            meaning_str_stripped = meaning_str.strip()
-            correct_meaning_obj = next((m for m in meanings_array if m['meaning'].strip() == meaning_str_stripped), None)
-            if correct_meaning_obj:
-                word_lvl = correct_meaning_obj.get('level', '').lower()
+        correct_meaning_obj = get_item_details(item_key)
+        word_lvl = correct_meaning_obj.get('level', '').lower() if correct_meaning_obj else None
 
         if not word_lvl:
             print(f"WARNING: Could not determine level for item_key '{item_key}'. Skipping update.")
             continue
 
+        resolved_results.append((item_key, word_lvl, result))
+
+    # --- NEW: Only load the stats of the items touched by this batch ---
+    touched_keys_by_level = {}
+    for item_key, word_lvl, _ in resolved_results:
+        touched_keys_by_level.setdefault(word_lvl, set()).add(item_key)
+    all_level_data = {
+        lvl: data_manager.load_repetition_stats(lvl, item_keys)
+        for lvl, item_keys in touched_keys_by_level.items()
+    }
+
+    # 3. Process each result from the quiz
+    for item_key, word_lvl, result in resolved_results:
         # Get or create the statistics for this specific item
         stats = all_level_data[word_lvl].setdefault(item_key, data_manager.get_new_repetition_schema())
         
         daily_wrong_count_for_item = daily_wrong_counts_today.get(item_key, 0)
         
         # Update the item's repetition stats
+        previous_next_show_date = stats.get('next_show_date')
         final_stats, was_just_learned = word_updater.process_quiz_result(stats, result, daily_wrong_count_for_item)
         all_level_data[word_lvl][item_key] = final_stats
 
+        # Keep the due-date index in step with the new schedule
+        if final_stats.get('next_show_date') != previous_next_show_date:
+            due_index.reschedule(word_lvl, item_key, final_stats.get('next_show_date'))
+
         # --- ADD THIS BLOCK ---
         # If the word was just learned, add it to the report.
         if was_just_learned:
@@ -59,18 +97,30 @@ def process_quiz_results(results):
             # We store the date it was learned.
             learned_words_for_level[item_key] = today_str
 
-    # 4. Update aggregate reports
-    report_data = report_updater.update_reports_from_results(
-        report_data, results, word_level_map, word_details_map
-    )
+    try:
+        # 4. Update aggregate reports
+        report_data = report_updater.update_reports_from_results(report_data, results, day_aggregates)
+
+        # Clean up the temporary key before saving
+        if 'today_str' in report_data:
+            del report_data['today_str']
+        # Parts a replay finds already written are left as they are.
+        if not (summary_done and day_done):
+            report_manager.save_report_data(
+                report_data, updated_aggregates=[today_str], journal_id=journal_id,
+                write_summary=not summary_done, days=[] if day_done else [today_str]
+            )
 
-    # 5. Persist all changes to the filesystem
-    for lvl, data_to_save in all_level_data.items():
-        data_manager.save_repetition_stats(lvl, data_to_save)
-    
-    # Clean up the temporary key before saving
-    if 'today_str' in report_data:
-        del report_data['today_str']
-    report_manager.save_report_data(report_data)
+        # 5. Persist only the changed items of the touched levels, last
+        for lvl, data_to_save in all_level_data.items():
+            data_manager.save_repetition_stats(lvl, data_to_save, changed_keys=touched_keys_by_level[lvl])
+        if journal_id is not None:
+            data_manager.flush_repetition_stats(applied_journal_id=journal_id)
+    except Exception:
+        # The cached totals may now be ahead of the file; rebuild them on the next read.
+        report_manager.discard_day_aggregates(today_str)
+        raise
+    # Responses cached by ETag (see routes/versioning.py) are now out of date
+    data_manager.bump_data_version()
 
     print(f"Successfully processed and saved {len(results)} quiz results.")
\ No newline at end of file
@@ -0,0 +1,158 @@
+import secrets
+import time
+from datetime import date, datetime
+import data_manager
+from logic import quiz_selector
+
+# Centralized configuration for prefetched quiz sessions
+DEFAULT_SESSION_ROUNDS = 10
+MAX_SESSION_ROUNDS = 20
+MAX_SESSIONS_PER_USER = 8     # Older sessions of a learner are dropped first
+SESSION_TTL_SECONDS = 3 * 3600
+
+
+class QuizSession:
+    """
+    Rounds of item_keys picked in one selection pass, plus a cursor to the next round.
+    `pending` maps the served item_keys whose answers have not been seen yet to
+    the time they were served.
+    """
+
+    def __init__(self, level, rounds, session_info, session_id=None, cursor=0,
+                 created_day=None, last_used=None, pending=None):
+        self.session_id = session_id or secrets.token_urlsafe(12)
+        self.level = level
+        self.rounds = rounds
+        self.session_info = session_info
+        self.cursor = cursor
+        self.created_day = created_day or datetime.now().strftime('%Y-%m-%d')
+        # Wall-clock time, since the session may be used by another process next.
+        self.last_used = last_used if last_used is not None else time.time()
+        self.pending = pending or {}
+
+    @classmethod
+    def from_state(cls, session_id, state):
+        return cls(session_id=session_id, **state)
+
+    def to_state(self):
+        return {
+            "level": self.level,
+            "rounds": self.rounds,
+            "session_info": self.session_info,
+            "cursor": self.cursor,
+            "created_day": self.created_day,
+            "last_used": self.last_used,
+            "pending": self.pending,
+        }
+
+    def is_expired(self):
+        # Selections depend on today's report and due dates, so they do not survive midnight.
+        return (
+            self.created_day != datetime.now().strftime('%Y-%m-%d')
+            or time.time() - self.last_used > SESSION_TTL_SECONDS
+        )
+
+
+def _came_back_due(stats):
+    """
+    True if an answered word is due again today: its last answer was wrong, or
+    the scheduler set its next_show_date to today or earlier. A correct answer on
+    an unscheduled word leaves next_show_date empty, which does not count.
+    """
+    if stats.get('last_result_was_wrong'):
+        return True
+    next_show_str = stats.get('next_show_date')
+    if not next_show_str:
+        return False
+    try:
+        return datetime.fromisoformat(next_show_str).date() <= date.today()
+    except (ValueError, TypeError):
+        return False
+
+def _splice_answered_due(session):
+    """
+    Moves the served words that were answered and came back due (e.g. answered
+    wrongly) to the front of the remaining rounds, so they return in this sitting
+    without a new selection pass. The number of rounds stays the same; words
+    pushed past the last round are left to the next session.
+    """
+    if not session.pending or session.cursor >= len(session.rounds):
+        return
+    stats = data_manager.load_repetition_stats(session.level, session.pending)
+    answered = [
+        item_key for item_key, served_at in session.pending.items()
+        if (stats.get(item_key, {}).get('last_seen') or '') >= served_at
+    ]
+    for item_key in answered:
+        del session.pending[item_key]
+    due_again = [item_key for item_key in answered if _came_back_due(stats[item_key])]
+    if not due_again:
+        return
+    remaining = session.rounds[session.cursor:]
+    queued = list(dict.fromkeys(due_again + [item_key for round_keys in remaining for item_key in round_keys]))
+    round_size = quiz_selector.QUIZ_SIZE
+    session.rounds = session.rounds[:session.cursor] + [
+        queued[index * round_size:(index + 1) * round_size] for index in range(len(remaining))
+    ]
+
+def _serve_round(session):
+    """Advances the cursor and returns the next round with fresh stats for its words."""
+    item_keys = session.rounds[session.cursor] if session.cursor < len(session.rounds) else []
+    session.cursor += 1
+    session.last_used = time.time()
+    served_at = datetime.now().isoformat()
+    session.pending.update((item_key, served_at) for item_key in item_keys)
+    stats = data_manager.load_repetition_stats(session.level, item_keys)
+    return {
+        "session_id": session.session_id,
+        "round_index": session.cursor - 1,
+        "rounds_remaining": max(len(session.rounds) - session.cursor, 0),
+        "quiz_words": quiz_selector.format_quiz_words(session.level, item_keys),
+        # StatsRecords are converted to plain dicts for the JSON response.
+        "stats": {item_key: dict(stats.get(item_key, {})) for item_key in item_keys},
+        "session_info": session.session_info,
+    }
+
+def start_session(level, rounds=DEFAULT_SESSION_ROUNDS):
+    """
+    Selects up to `rounds` quiz rounds for the current learner in one pass,
+    stores them as a session and returns the first round.
+    """
+    rounds = max(1, min(int(rounds), MAX_SESSION_ROUNDS))
+    selection = quiz_selector.select_quiz_rounds(level, rounds)
+    session = QuizSession(level, selection["rounds"], selection["session_info"])
+    round_data = _serve_round(session)
+    store = data_manager.get_quiz_session_store()
+    with store.locked():
+        live_ids = []
+        for session_id, state in store.all():
+            if QuizSession.from_state(session_id, state).is_expired():
+                store.delete(session_id)
+            else:
+                live_ids.append(session_id)
+        # Make room for the new session by dropping the oldest ones.
+        for session_id in live_ids[:max(len(live_ids) + 1 - MAX_SESSIONS_PER_USER, 0)]:
+            store.delete(session_id)
+        store.put(session.session_id, session.to_state())
+    return round_data
+
+def next_round(session_id):
+    """
+    Returns the next round of a session, or None if the session is unknown,
+    expired or used up; the client then starts a new session. Sessions are
+    stored per learner on disk, so any server process can serve any session.
+    """
+    store = data_manager.get_quiz_session_store()
+    with store.locked():
+        state = store.get(session_id)
+        if state is None:
+            return None
+        session = QuizSession.from_state(session_id, state)
+        if not session.is_expired():
+            _splice_answered_due(session)
+        if session.is_expired() or session.cursor >= len(session.rounds):
+            store.delete(session_id)
+            return None
+        round_data = _serve_round(session)
+        store.put(session_id, session.to_state())
+        return round_data
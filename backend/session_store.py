@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import json_codec
+
+# One row per quiz session; `state` is the session as JSON (see services/session_service.py).
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz_sessions (
+    session_id TEXT PRIMARY KEY,
+    state      TEXT NOT NULL
+);
+"""
+
+
+class QuizSessionStore:
+    """
+    An embedded SQLite store for a learner's prefetched quiz sessions, so every
+    server process can serve the next round of a session another one started.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    def _connect(self):
+        """Returns this thread's connection, creating the database on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; `locked()` opens the transactions explicitly.
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def locked(self):
+        """
+        Runs the block as one transaction holding the database's write lock, so
+        two processes never advance the same session at once.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def get(self, session_id):
+        """Returns the stored state of a session, or None if it is unknown."""
+        row = self._connect().execute(
+            "SELECT state FROM quiz_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def all(self):
+        """Returns [(session_id, state), ...], oldest session first."""
+        rows = self._connect().execute("SELECT session_id, state FROM quiz_sessions ORDER BY rowid").fetchall()
+        return [(session_id, json_codec.loads(state)) for session_id, state in rows]
+
+    def put(self, session_id, state):
+        """Inserts a session, or updates it in place (keeping its age)."""
+        self._connect().execute(
+            "INSERT INTO quiz_sessions (session_id, state) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state",
+            (session_id, json_codec.dumps(state))
+        )
+
+    def delete(self, session_id):
+        self._connect().execute("DELETE FROM quiz_sessions WHERE session_id = ?", (session_id,))
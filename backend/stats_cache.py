@@ -0,0 +1,204 @@
+import copy
+import threading
+from contextlib import contextmanager
+
+
+class WriteBehindStatsCache:
+    """
+    An in-process, write-behind cache in front of the RepetitionStore.
+
+    Reads are served from memory as long as the store's version counter still
+    matches the version this cache last saw. When another process has written,
+    only the levels whose own version changed are dropped. Writes go to memory, are marked dirty and are flushed to the
+    store by a background thread every `flush_interval` seconds, or on `flush()`.
+    """
+
+    def __init__(self, store, flush_interval):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        # Reentrant, so a caller holding back flushes (see hold_flushes) can still flush itself
+        self._flush_lock = threading.RLock()
+        self._levels = {}           # level -> { item_key: stats }
+        self._dirty = {}            # level -> { item_key: stats } not yet flushed
+        self._in_flight = {}        # level -> { item_key: stats } being flushed right now
+        self._known_version = None  # store version the cached levels correspond to
+        self._store_level_versions = {}  # level -> level version as of _known_version
+        self._cached_versions = {}       # level -> level version its cached stats correspond to
+        # Indexes derived from the stats compare (generation, level generation) to know
+        # they are stale: a level's generation is bumped when that level is dropped
+        # because another writer changed it, `generation` when everything is dropped.
+        self.generation = 0
+        self._level_generations = {}
+        self._flusher_thread = None
+        self._stop_event = threading.Event()
+
+    def _validate(self):
+        """Drops the cached levels that someone else wrote since this cache last looked."""
+        version = self.store.get_version()
+        if version == self._known_version:
+            return
+        self._known_version, self._store_level_versions = self.store.get_versions()
+        self._drop_stale_levels()
+
+    def _drop_stale_levels(self):
+        for level in list(self._levels):
+            if self._cached_versions.get(level) != self._store_level_versions.get(level, 0):
+                self._drop_level(level)
+
+    def _drop_level(self, level):
+        self._levels.pop(level, None)
+        self._cached_versions.pop(level, None)
+        self._level_generations[level] = self._level_generations.get(level, 0) + 1
+
+    def get_generation(self, level):
+        """Validates the cache against the store and returns the generation of a level."""
+        with self._lock:
+            self._validate()
+            return self.generation, self._level_generations.get(level, 0)
+
+    def _get_level(self, level):
+        """Returns the cached stats of a level, loading it (plus unflushed writes) if needed."""
+        self._validate()
+        level_data = self._levels.get(level)
+        if level_data is None:
+            # Run the one-time JSON import first, since it bumps the level's version.
+            if self.store.ensure_imported(level):
+                self._validate()
+            # The version seen before loading: a write that lands during the load
+            # makes the level stale, so it is read again.
+            self._cached_versions[level] = self._store_level_versions.get(level, 0)
+            level_data = self.store.load(level)
+            # Unflushed writes are newer than anything in the store.
+            level_data.update(self._in_flight.get(level, {}))
+            level_data.update(self._dirty.get(level, {}))
+            self._levels[level] = level_data
+        return level_data
+
+    def load(self, level, item_keys=None):
+        """
+        Returns { item_key: stats } for a level.
+        Full-level loads share the cached stats dicts and must be treated as read-only;
+        loads of specific item_keys return private copies that callers may modify.
+        """
+        with self._lock:
+            level_data = self._get_level(level)
+            if item_keys is None:
+                return dict(level_data)
+            return {
+                item_key: copy.deepcopy(level_data[item_key])
+                for item_key in item_keys if item_key in level_data
+            }
+
+    def save(self, level, data, changed_keys=None):
+        """
+        Records new stats for a level. With `changed_keys`, only those items are
+        taken from `data` and flushed later; otherwise the level is replaced at once.
+        """
+        if changed_keys is None:
+            with self._flush_lock, self._lock:
+                self._dirty.pop(level, None)
+                new_version = self.store.replace_level(level, data)
+                self._levels[level] = dict(data)
+                self._cached_versions[level] = self._store_level_versions.get(level, 0)
+                self._track_own_write(new_version, [level])
+            return
+
+        with self._lock:
+            level_data = self._get_level(level)
+            dirty = self._dirty.setdefault(level, {})
+            for item_key in changed_keys:
+                if item_key in data:
+                    level_data[item_key] = data[item_key]
+                    dirty[item_key] = data[item_key]
+        self._start_flusher()
+
+    def _track_own_write(self, new_version, levels):
+        """
+        Keeps the cached levels valid after our own write. If another writer got in
+        between, the levels it changed are dropped.
+        """
+        for level in levels:
+            # Our write bumped each of these levels once.
+            self._store_level_versions[level] = self._store_level_versions.get(level, 0) + 1
+            if level in self._cached_versions:
+                self._cached_versions[level] += 1
+        if self._known_version is not None and new_version == self._known_version + 1:
+            self._known_version = new_version
+        else:
+            self._known_version, self._store_level_versions = self.store.get_versions()
+            self._drop_stale_levels()
+
+    def discard_unflushed(self):
+        """
+        Drops every write not flushed yet and the cached levels they were applied
+        to, so the next read comes from the store. Derived indexes are rebuilt.
+        """
+        with self._lock:
+            self._dirty = {}
+            self._levels.clear()
+            self._cached_versions.clear()
+            self.generation += 1
+
+    @contextmanager
+    def hold_flushes(self):
+        """
+        Keeps the background flusher from writing while the block runs, so a
+        multi-step update reaches the store in the single flush that ends it.
+        """
+        with self._flush_lock:
+            yield
+
+    def flush(self, meta=None):
+        """
+        Writes every dirty item, plus the optional store `meta` values, to the
+        store in one transaction. Returns the number of items written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                # Take the dirty items; anything saved from now on is dirty again.
+                batches = {level: items for level, items in self._dirty.items() if items}
+                self._dirty = {}
+                self._in_flight = batches
+
+            if not batches and not meta:
+                return 0
+            try:
+                new_version = self.store.upsert_levels(batches, meta)
+            except Exception:
+                # Put the items back (unless a newer write replaced them) so the next flush retries them.
+                with self._lock:
+                    for failed_level, failed_items in batches.items():
+                        dirty = self._dirty.setdefault(failed_level, {})
+                        for item_key, stats in failed_items.items():
+                            dirty.setdefault(item_key, stats)
+                    self._in_flight = {}
+                raise
+            with self._lock:
+                self._track_own_write(new_version, batches.keys())
+                self._in_flight = {}
+        return sum(len(items) for items in batches.values())
+
+    def close(self):
+        """Stops the background flusher and writes out everything still pending."""
+        self._stop_event.set()
+        return self.flush()
+
+    def _run_flusher(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"ERROR: Background flush of repetition stats failed: {e}")
+
+    def _start_flusher(self):
+        """Starts the background flush thread once per process."""
+        if self._flusher_thread is not None and self._flusher_thread.is_alive():
+            return
+        with self._lock:
+            if self._flusher_thread is not None and self._flusher_thread.is_alive():
+                return
+            self._flusher_thread = threading.Thread(
+                target=self._run_flusher, name="stats-flusher", daemon=True
+            )
+            self._flusher_thread.start()
@@ -0,0 +1,188 @@
+from collections.abc import MutableMapping
+
+# The single source of truth for a new word's repetition stats.
+# 'recent_history' (a list of 1 = correct / 0 = wrong, oldest first) is kept
+# bit-packed in the record; every other field is stored as is.
+REPETITION_SCHEMA = {
+    "right": 0,
+    "wrong": 0,
+    "article_wrong": 0,
+    "total_encountered": 0,
+    "last_seen": None,
+    "last_correct": None,
+    "consecutive_correct": 0,
+    "streak_level": 0,
+    "current_delay_days": 0,
+    "next_show_date": None,
+    "recent_history": [],
+    "failed_first_encounter": False,
+    "last_result_was_wrong": False,
+    "successful_corrections": 0,
+    "is_starred": False,
+    "is_learned": False, # Tracks long-term learned status
+}
+
+_HISTORY = "recent_history"
+_SCALAR_FIELDS = tuple(key for key in REPETITION_SCHEMA if key != _HISTORY)
+_SCALAR_DEFAULTS = tuple(REPETITION_SCHEMA[key] for key in _SCALAR_FIELDS)
+_FIELD_SET = frozenset(REPETITION_SCHEMA)
+
+
+class StatsRecord(MutableMapping):
+    """
+    The repetition stats of one item, with the same keys as REPETITION_SCHEMA.
+
+    It behaves like the stats dict it replaces (stats['right'], stats.get(...),
+    {**stats}, dict(stats)), but uses __slots__ instead of a per-item dict and
+    keeps recent_history as bits of one int plus a length: appending shifts in a
+    bit and drops the oldest once the history is full, like a ring buffer.
+    Reading stats['recent_history'] returns a fresh list; assigning a list to it
+    re-packs the bits. Keys outside the schema are kept, so JSON round-trips.
+    """
+    __slots__ = _SCALAR_FIELDS + ("_history_bits", "_history_len", "_extra")
+
+    def __init__(self):
+        for key, default in zip(_SCALAR_FIELDS, _SCALAR_DEFAULTS):
+            setattr(self, key, default)
+        self._history_bits = 0
+        self._history_len = 0
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a record from a stats dict (missing keys get their schema defaults)."""
+        record = cls.__new__(cls)
+        get = data.get
+        for key, default in zip(_SCALAR_FIELDS, _SCALAR_DEFAULTS):
+            setattr(record, key, get(key, default))
+        record.set_history(get(_HISTORY) or ())
+        record._extra = None
+        if not _FIELD_SET.issuperset(data):
+            record._extra = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        return record
+
+    def to_dict(self):
+        """Returns the stats as a plain, JSON-serializable dict in schema order."""
+        data = {
+            key: self.history_list() if key == _HISTORY else getattr(self, key)
+            for key in REPETITION_SCHEMA
+        }
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def copy(self):
+        record = StatsRecord.__new__(StatsRecord)
+        for key in self.__slots__:
+            setattr(record, key, getattr(self, key))
+        if self._extra:
+            record._extra = dict(self._extra)
+        return record
+
+    def __deepcopy__(self, memo):
+        # Every field is immutable except _extra, which copy() duplicates.
+        return self.copy()
+
+    # --- recent_history ---
+    def history_list(self):
+        """Returns recent_history as a list of 0/1 ints, oldest first."""
+        n = self._history_len
+        if n == 0:
+            return []
+        return [int(bit) for bit in format(self._history_bits, f"0{n}b")]
+
+    def set_history(self, values):
+        """Replaces recent_history with `values` (oldest first)."""
+        self._history_bits = int("".join("1" if value else "0" for value in values) or "0", 2)
+        self._history_len = len(values)
+
+    def push_history(self, is_correct, max_length):
+        """Appends one answer and keeps only the latest `max_length` answers."""
+        bits = (self._history_bits << 1) | (1 if is_correct else 0)
+        length = self._history_len + 1
+        if length > max_length:
+            bits &= (1 << max_length) - 1
+            length = max_length
+        self._history_bits = bits
+        self._history_len = length
+
+    def history_length(self):
+        return self._history_len
+
+    def history_flips(self):
+        """Counts how often consecutive answers in recent_history differ."""
+        n = self._history_len
+        if n < 2:
+            return 0
+        return ((self._history_bits ^ (self._history_bits >> 1)) & ((1 << (n - 1)) - 1)).bit_count()
+
+    # --- Mapping protocol ---
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            if key == _HISTORY:
+                return self.history_list()
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # Faster than MutableMapping.get, which goes through a try/except.
+        if key in _FIELD_SET:
+            if key == _HISTORY:
+                return self.history_list()
+            return getattr(self, key)
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key == _HISTORY:
+                self.set_history(list(value or ()))
+            else:
+                setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            # Schema fields always exist; deleting one resets it to its default.
+            self[key] = REPETITION_SCHEMA[key]
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or bool(self._extra and key in self._extra)
+
+    def __iter__(self):
+        yield from REPETITION_SCHEMA
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return len(REPETITION_SCHEMA) + (len(self._extra) if self._extra else 0)
+
+    def __repr__(self):
+        return f"StatsRecord({self.to_dict()!r})"
+
+
+def history_summary(stats):
+    """
+    Returns (length, flips) of an item's recent_history, for a StatsRecord
+    (straight from the packed bits) or a plain stats dict.
+    """
+    if isinstance(stats, StatsRecord):
+        return stats.history_length(), stats.history_flips()
+    history = stats.get(_HISTORY, [])
+    return len(history), sum(1 for a, b in zip(history, history[1:]) if a != b)
+
+def to_json_value(obj):
+    """`default=` hook for json.dumps, so StatsRecords serialize as their dicts."""
+    if isinstance(obj, StatsRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
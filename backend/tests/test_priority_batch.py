@@ -0,0 +1,121 @@
+"""
+Parity of the vectorized priority scoring (priority_metrics/batch.py) with the
+scalar quiz_selector.calculate_item_priority on randomized stats.
+
+Run from the backend folder:
+    python -m pytest tests
+"""
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("numpy")
+
+from logic import quiz_selector  # noqa: E402
+from logic.priority_metrics import batch, recency  # noqa: E402
+from stats_record import StatsRecord  # noqa: E402
+
+NOW = datetime(2026, 3, 15, 12, 30, 45, 123456)
+WORD_TYPES = ["Nomen", "Verb", "Adjektiv", None]
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz is None else NOW.replace(tzinfo=tz)
+
+
+@pytest.fixture(autouse=True)
+def frozen_now(monkeypatch):
+    # The scalar recency metric reads datetime.now(); both paths must use the same instant.
+    monkeypatch.setattr(recency, "datetime", _FrozenDatetime)
+
+
+def _last_seen(rng):
+    kind = rng.choice(["none", "empty", "naive", "naive_date", "aware", "zulu", "garbage", "future"])
+    offset = timedelta(days=rng.uniform(0, 30), seconds=rng.randint(0, 86_399))
+    if kind == "none":
+        return None
+    if kind == "empty":
+        return ""
+    if kind == "naive":
+        return (NOW - offset).isoformat()
+    if kind == "naive_date":
+        return (NOW - offset).date().isoformat()
+    if kind == "aware":
+        return (NOW - offset).replace(tzinfo=timezone(timedelta(hours=rng.choice([-5, 1, 2])))).isoformat()
+    if kind == "zulu":
+        return (NOW - offset).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if kind == "garbage":
+        return rng.choice(["yesterday", "2026-13-45", "not a date", "2025", "2025-06", "NaT"])
+    return (NOW + offset).isoformat()
+
+
+def _random_stats(rng):
+    total = rng.randint(0, 40)
+    stats = {
+        "right": rng.randint(0, total),
+        "wrong": rng.randint(0, 15),
+        "article_wrong": rng.randint(0, 8),
+        "total_encountered": total,
+        "last_seen": _last_seen(rng),
+        "recent_history": [rng.randint(0, 1) for _ in range(rng.randint(0, 12))],
+        "failed_first_encounter": rng.random() < 0.3,
+        "successful_corrections": rng.randint(0, 6),
+        "is_starred": rng.random() < 0.1,
+    }
+    return stats
+
+
+def _random_details(rng):
+    word_type = rng.choice(WORD_TYPES)
+    return {"type": word_type} if word_type else {}
+
+
+@pytest.mark.parametrize("as_records", [False, True], ids=["dicts", "stats_records"])
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_scores_match_scalar_scores(seed, as_records):
+    rng = random.Random(seed)
+    stats_list = [_random_stats(rng) for _ in range(400)]
+    details_list = [_random_details(rng) for _ in stats_list]
+    if as_records:
+        stats_list = [StatsRecord.from_dict(stats) for stats in stats_list]
+
+    expected = [quiz_selector.calculate_item_priority(s, d) for s, d in zip(stats_list, details_list)]
+    actual = batch.calculate_priority_scores(batch.stats_to_columns(stats_list, details_list), now=NOW).tolist()
+
+    assert actual == pytest.approx(expected, abs=1e-9)
+
+
+def test_last_seen_edge_cases_score_like_the_scalar_path():
+    details = {"type": "Nomen"}
+    values = [None, "", "not a date", "2026-03-10T08:00:00+02:00", "2026-03-10T08:00:00Z",
+              "2026-03-01", "2026-03-14T12:30:45.123457", "2026-04-01T00:00:00",
+              "2025", "2025-06", "NaT", "2026-03-10 08:00:00", "2026-03-10T08", "20260310"]
+    stats_list = [{"total_encountered": 3, "right": 1, "wrong": 2, "last_seen": value} for value in values]
+
+    expected = [quiz_selector.calculate_item_priority(s, details) for s in stats_list]
+    actual = batch.calculate_priority_scores(
+        batch.stats_to_columns(stats_list, [details] * len(stats_list)), now=NOW
+    ).tolist()
+
+    assert actual == pytest.approx(expected, abs=1e-9)
+
+
+def test_values_numpy_accepts_but_fromisoformat_rejects_score_like_the_scalar_path():
+    # Every value here parses as datetime64, so none of them forces the per-item path.
+    details = {"type": "Verb"}
+    values = ["2026-03-10T08:00:00", "2025", "2025-06", "NaT"]
+    stats_list = [{"total_encountered": 3, "right": 1, "wrong": 2, "last_seen": value} for value in values]
+
+    expected = [quiz_selector.calculate_item_priority(s, details) for s in stats_list]
+    actual = batch.calculate_priority_scores(
+        batch.stats_to_columns(stats_list, [details] * len(stats_list)), now=NOW
+    ).tolist()
+
+    assert actual == pytest.approx(expected, abs=1e-9)
@@ -0,0 +1,152 @@
+import atexit
+import contextvars
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+# Centralized configuration for multi-learner storage
+DEFAULT_USER_ID = "default"
+# The default learner keeps the original top-level folders; every other learner
+# gets the same layout under users/<user_id>/.
+USERS_FOLDER = Path("users")
+MAX_LOADED_USERS = 32  # Learners whose caches stay in memory; least recently used are evicted
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_current_user_id = contextvars.ContextVar("current_user_id", default=DEFAULT_USER_ID)
+_registry_lock = threading.RLock()
+_loaded_users = OrderedDict()  # user_id -> UserState, least recently used first
+
+
+class UserState:
+    """
+    Everything one learner has loaded in this process. Modules keep their
+    per-learner objects (stats cache, locks, indexes) in named slots, so this
+    class does not need to know about them.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.root = Path(".") if user_id == DEFAULT_USER_ID else USERS_FOLDER / user_id
+        self.pins = 0
+        self._slots = {}
+        self._close_hooks = []
+        self._lock = threading.RLock()
+
+    def path(self, relative_path):
+        """Resolves one of the data paths (e.g. Path("repetition-list")) for this learner."""
+        return self.root / relative_path
+
+    def get(self, name):
+        """Returns the slot `name`, or None if nothing created it yet."""
+        return self._slots.get(name)
+
+    def get_or_create(self, name, factory):
+        """Returns the slot `name`, creating it with `factory()` on first use."""
+        value = self._slots.get(name)
+        if value is None:
+            with self._lock:
+                value = self._slots.get(name)
+                if value is None:
+                    value = self._slots[name] = factory()
+        return value
+
+    def add_close_hook(self, hook):
+        """Registers a function that is called when this learner is evicted (e.g. a flush)."""
+        with self._lock:
+            self._close_hooks.append(hook)
+
+    def close(self):
+        """Runs every close hook. Errors are logged so one failure cannot skip the rest."""
+        with self._lock:
+            hooks, self._close_hooks = self._close_hooks, []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"ERROR: Failed to close state of user '{self.user_id}': {e}")
+
+
+def is_valid_user_id(user_id):
+    """User ids become folder names, so only letters, digits, '-' and '_' are allowed."""
+    return isinstance(user_id, str) and bool(_USER_ID_PATTERN.match(user_id))
+
+def current_user_id():
+    """Returns the learner the current request (or background job) works for."""
+    return _current_user_id.get()
+
+def _evict_over_capacity(capacity=None):
+    """Closes least recently used learners nobody is using until at most `capacity` are loaded."""
+    capacity = MAX_LOADED_USERS if capacity is None else capacity
+    while len(_loaded_users) > capacity:
+        victim = next((s for s in _loaded_users.values() if s.pins == 0), None)
+        if victim is None:
+            # Every loaded learner is in use; go over capacity until one is released.
+            return
+        del _loaded_users[victim.user_id]
+        # Closing happens under the registry lock so the learner cannot be
+        # reloaded before its pending writes are flushed.
+        victim.close()
+        print(f"INFO: Evicted user '{victim.user_id}' from memory.")
+
+def get_user_state(user_id=None):
+    """Returns the loaded state of a learner (the current one by default), loading it if needed."""
+    user_id = user_id or current_user_id()
+    with _registry_lock:
+        state = _loaded_users.get(user_id)
+        if state is None:
+            if not is_valid_user_id(user_id):
+                raise ValueError(f"Invalid user id '{user_id}'")
+            # Make room first, so the new learner itself is never the one evicted.
+            _evict_over_capacity(MAX_LOADED_USERS - 1)
+            state = _loaded_users[user_id] = UserState(user_id)
+        else:
+            _loaded_users.move_to_end(user_id)
+        return state
+
+def current():
+    """Shortcut for the current learner's state."""
+    return get_user_state(current_user_id())
+
+@contextmanager
+def use_user(user_id):
+    """
+    Runs the enclosed code on behalf of `user_id`. The learner is pinned while
+    inside, so it cannot be evicted (and flushed) while it is being used.
+    """
+    with _registry_lock:
+        state = get_user_state(user_id)
+        state.pins += 1
+    token = _current_user_id.set(user_id)
+    try:
+        yield state
+    finally:
+        _current_user_id.reset(token)
+        with _registry_lock:
+            state.pins -= 1
+            _evict_over_capacity()
+
+def loaded_user_ids():
+    """Returns the learners currently held in memory, least recently used first."""
+    with _registry_lock:
+        return list(_loaded_users)
+
+def known_user_ids():
+    """Returns the default learner plus every learner with a folder on disk."""
+    user_ids = [DEFAULT_USER_ID]
+    if USERS_FOLDER.exists():
+        user_ids.extend(sorted(
+            path.name for path in USERS_FOLDER.iterdir()
+            if path.is_dir() and is_valid_user_id(path.name) and path.name != DEFAULT_USER_ID
+        ))
+    return user_ids
+
+def close_all():
+    """Closes (flushes) every loaded learner. Registered to run on interpreter exit."""
+    with _registry_lock:
+        states = list(_loaded_users.values())
+    for state in states:
+        state.close()
+
+atexit.register(close_all)
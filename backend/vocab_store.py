@@ -0,0 +1,208 @@
+import marshal
+import mmap
+import struct
+from collections.abc import Mapping
+import json_codec
+
+# File layout (all integers little-endian):
+#   header    : magic, index length, offsets position, item count
+#   index     : marshal dump of the small per-item fields and lookup dicts
+#   offsets   : item_count + 1 unsigned 64-bit offsets into the body section
+#               (8-byte aligned, read in place through a memoryview)
+#   bodies    : one UTF-8 JSON object per meaning, decoded only on access
+_MAGIC = b"GSRVOC\x00\x01"
+_HEADER = struct.Struct("<8sQQQ")
+FORMAT_VERSION = 1
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def encode_vocabulary(level_words, sources):
+    """
+    Encodes { level: { word: [meaning, ...] } } into the vocabulary file format.
+    `sources` records the output files it was built from. Returns the bytes.
+    """
+    item_keys, base_words, types, bodies, stripped_meanings = [], [], [], [], []
+    levels = {}
+    level_key_ids = {}
+    index_key_ids = {}   # normalized item_key -> id, first meaning (in merged word order) wins
+    word_order = {}      # word -> [ids] in the order the old merged details map used
+    for lvl, words in level_words.items():
+        start = len(item_keys)
+        key_ids = level_key_ids[lvl] = {}
+        for word, meanings_list in words.items():
+            ids = word_order.setdefault(word, [])
+            for meaning in meanings_list:
+                item_id = len(item_keys)
+                item_key = f"{meaning['word']}#{meaning['meaning']}"
+                item_keys.append(item_key)
+                base_words.append(word)
+                types.append(meaning.get('type'))
+                stripped_meanings.append(meaning['meaning'].strip())
+                key_ids[item_key] = item_id
+                ids.append(item_id)
+                # 'level' is injected on decode, so it does not need to be stored.
+                body = {k: v for k, v in meaning.items() if k != 'level'}
+                bodies.append(json_codec.dumps_bytes(body))
+        levels[lvl] = {"start": start, "end": len(item_keys), "word_count": len(words)}
+
+    for word, ids in word_order.items():
+        for item_id in ids:
+            normalized = f"{word}#{stripped_meanings[item_id]}"
+            if normalized == item_keys[item_id]:
+                # Reuse the same str object; marshal then stores (and loads) it once.
+                normalized = item_keys[item_id]
+            index_key_ids.setdefault(normalized, item_id)
+
+    index = marshal.dumps({
+        "format": FORMAT_VERSION,
+        "sources": sources,
+        "levels": levels,
+        "item_keys": item_keys,
+        "base_words": base_words,
+        "types": types,
+        "level_key_ids": level_key_ids,
+        "index_key_ids": index_key_ids,
+        "word_ids": {word: tuple(ids) for word, ids in word_order.items()},
+    })
+
+    offsets_pos = _align8(_HEADER.size + len(index))
+    offsets = [0]
+    for body in bodies:
+        offsets.append(offsets[-1] + len(body))
+    return b"".join([
+        _HEADER.pack(_MAGIC, len(index), offsets_pos, len(item_keys)),
+        index,
+        b"\0" * (offsets_pos - _HEADER.size - len(index)),
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        *bodies,
+    ])
+
+
+class VocabularyFile:
+    """
+    Read-only view of an encoded vocabulary. The meaning bodies stay in the
+    (memory-mapped) buffer and are decoded one at a time when asked for, so
+    several server processes share the same pages of the file.
+    """
+
+    def __init__(self, buffer, mapped_file=None):
+        self._buffer = buffer
+        self._mapped_file = mapped_file
+        magic, index_len, offsets_pos, item_count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a vocabulary file.")
+        index = marshal.loads(memoryview(buffer)[_HEADER.size:_HEADER.size + index_len])
+        if index.get("format") != FORMAT_VERSION:
+            raise ValueError("Unsupported vocabulary file format.")
+        self.sources = index["sources"]
+        self.levels = index["levels"]
+        self.item_keys = index["item_keys"]
+        self.base_words = index["base_words"]
+        self.types = index["types"]
+        self.level_key_ids = index["level_key_ids"]
+        self.index_key_ids = index["index_key_ids"]
+        self.word_ids = index["word_ids"]
+        self._offsets = memoryview(buffer)[offsets_pos:offsets_pos + (item_count + 1) * 8].cast('Q')
+        self._bodies_pos = offsets_pos + (item_count + 1) * 8
+        self._level_of = sorted((info["start"], lvl) for lvl, info in self.levels.items())
+
+    @classmethod
+    def open(cls, path):
+        """Memory-maps the file at `path`. Raises OSError/ValueError if it is missing or invalid."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapped, mapped)
+        except Exception:
+            mapped.close()
+            raise
+
+    def level_of(self, item_id):
+        """Returns the level an item id belongs to (ids are contiguous per level)."""
+        level = None
+        for start, lvl in self._level_of:
+            if start > item_id:
+                break
+            level = lvl
+        return level
+
+    def decode(self, item_id):
+        """Decodes one meaning object (a fresh dict, with its 'level' filled in)."""
+        start = self._bodies_pos + self._offsets[item_id]
+        end = self._bodies_pos + self._offsets[item_id + 1]
+        meaning = json_codec.loads(self._buffer[start:end])
+        meaning['level'] = self.level_of(item_id)
+        return meaning
+
+
+class VocabItem:
+    """
+    One quiz item of a level. 'item_key', 'base_word', 'type' and 'level' come
+    from the resident index; 'details' decodes the full meaning object on access.
+    """
+    __slots__ = ("_vocab", "_id")
+
+    def __init__(self, vocab, item_id):
+        self._vocab = vocab
+        self._id = item_id
+
+    def __getitem__(self, name):
+        if name == "item_key":
+            return self._vocab.item_keys[self._id]
+        if name == "base_word":
+            return self._vocab.base_words[self._id]
+        if name == "type":
+            return self._vocab.types[self._id]
+        if name == "level":
+            return self._vocab.level_of(self._id)
+        if name == "details":
+            return self._vocab.decode(self._id)
+        raise KeyError(name)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+class LevelItems(Mapping):
+    """{ item_key: VocabItem } for one level, backed by the vocabulary file."""
+
+    def __init__(self, vocab, level):
+        self._vocab = vocab
+        self._key_ids = vocab.level_key_ids.get(level, {})
+
+    def __getitem__(self, item_key):
+        return VocabItem(self._vocab, self._key_ids[item_key])
+
+    def __contains__(self, item_key):
+        return item_key in self._key_ids
+
+    def __iter__(self):
+        return iter(self._key_ids)
+
+    def __len__(self):
+        return len(self._key_ids)
+
+
+class WordDetails(Mapping):
+    """{ word: [meaning, ...] } over every level; the meanings are decoded on access."""
+
+    def __init__(self, vocab):
+        self._vocab = vocab
+
+    def __getitem__(self, word):
+        return [self._vocab.decode(item_id) for item_id in self._vocab.word_ids[word]]
+
+    def __contains__(self, word):
+        return word in self._vocab.word_ids
+
+    def __iter__(self):
+        return iter(self._vocab.word_ids)
+
+    def __len__(self):
+        return len(self._vocab.word_ids)
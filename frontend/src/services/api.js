@@ -1,25 +1,46 @@
 const API_URL = 'http://127.0.0.1:5000';
+const USER_STORAGE_KEY = 'vocabularyAppUser';
 
-export const fetchWordDetails = async (level) => {
-  const response = await fetch(`${API_URL}/api/words/details/${level}`);
-  if (!response.ok) throw new Error('Network response for word details was not ok');
+// --- NEW: Optional learner id, picked with ?user=<id> and remembered ---
+// Without one, the backend serves its default learner.
+const getUserId = () => {
+  const userFromUrl = new URLSearchParams(window.location.search).get('user');
+  if (userFromUrl) localStorage.setItem(USER_STORAGE_KEY, userFromUrl);
+  return userFromUrl || localStorage.getItem(USER_STORAGE_KEY);
+};
+
+const withUser = (headers = {}) => {
+  const userId = getUserId();
+  return userId ? { ...headers, 'X-User-Id': userId } : headers;
+};
+
+// --- NEW: Prefetched quiz sessions ---
+// Starts a session of several rounds and returns its first round (words plus their stats).
+export const startQuizSession = async (level, rounds) => {
+  const response = await fetch(`${API_URL}/api/session/${level}`, {
+    method: 'POST',
+    headers: withUser({ 'Content-Type': 'application/json' }),
+    body: JSON.stringify({ rounds }),
+  });
+  if (!response.ok) throw new Error('Failed to start a quiz session');
   return response.json();
 };
 
-export const fetchWordStats = async (words, level) => {
-  const response = await fetch(`${API_URL}/api/stats`, {
+// Advances a session and returns its next round, or null once it is finished or unknown.
+export const fetchNextQuizRound = async (sessionId) => {
+  const response = await fetch(`${API_URL}/api/session/${sessionId}/next`, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ words, level }),
+    headers: withUser(),
   });
-  if (!response.ok) throw new Error('Network response for word stats was not ok');
+  if (response.status === 404) return null;
+  if (!response.ok) throw new Error('Failed to fetch the next quiz round');
   return response.json();
 };
 
 export const updateWordStats = async (level, results) => {
   const response = await fetch(`${API_URL}/api/update`, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: withUser({ 'Content-Type': 'application/json' }),
     body: JSON.stringify({ level, results }),
   });
   if (!response.ok) throw new Error('Failed to update stats');
@@ -27,14 +48,14 @@ export const updateWordStats = async (level, results) => {
 };
 
 export const fetchPracticedTodayCount = async () => {
-    const response = await fetch(`${API_URL}/api/report/today`);
+    const response = await fetch(`${API_URL}/api/report/today`, { headers: withUser() });
     if (!response.ok) throw new Error('Failed to fetch daily stats');
     const data = await response.json();
     return data.practiced_today || 0;
 };
 
 export const fetchTodayStats = async () => {
-    const response = await fetch(`${API_URL}/api/report/today_stats`);
+    const response = await fetch(`${API_URL}/api/report/today_stats`, { headers: withUser() });
     if (!response.ok) throw new Error('Failed to fetch today\'s accuracy stats');
     return response.json();
 };
@@ -43,7 +64,7 @@ export const fetchTodayStats = async () => {
 export const updateStarStatus = async (item_key, is_starred) => {
   const response = await fetch(`${API_URL}/api/word/star`, {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: withUser({ 'Content-Type': 'application/json' }),
     body: JSON.stringify({ item_key, is_starred }),
   });
   if (!response.ok) throw new Error('Failed to update star status');
@@ -52,7 +73,7 @@ export const updateStarStatus = async (item_key, is_starred) => {
 
 // --- NEW FUNCTION ---
 export const fetchDailyDebrief = async (level) => {
-  const response = await fetch(`${API_URL}/api/report/daily_debrief/${level}`);
+  const response = await fetch(`${API_URL}/api/report/daily_debrief/${level}`, { headers: withUser() });
   if (!response.ok) throw new Error('Failed to fetch daily debrief data');
   return response.json();
 };
\ No newline at end of file
@@ -4,6 +4,8 @@ import { createQuizItems, rehydrateQuizAnswers } from '../utils/quizProcessor';
 
 const LEVEL_STORAGE_KEY = 'vocabularyAppLevel';
 const SESSION_KEY_PREFIX = 'vocabularyQuizSession_';
+const SERVER_SESSION_KEY_PREFIX = 'vocabularyQuizServerSession_';
+const ROUNDS_PER_SESSION = 10;
 const getTodayString = () => new Date().toISOString().split('T')[0];
 
 export const useQuizStore = create((set, get) => ({
@@ -89,7 +91,15 @@ export const useQuizStore = create((set, get) => ({
     set({ isLoading: true, quizItems: [], feedback: 'Fetching new words...' });
 
     try {
-      const { quiz_words: meaningDetailsList, session_info: sessionInfo } = await api.fetchWordDetails(level);
+      // --- NEW: Pull the next round from the server-side session; start a new one when it runs out ---
+      const serverSessionKey = `${SERVER_SESSION_KEY_PREFIX}${level}`;
+      const serverSessionId = sessionStorage.getItem(serverSessionKey);
+      let round = serverSessionId ? await api.fetchNextQuizRound(serverSessionId) : null;
+      if (!round) {
+        round = await api.startQuizSession(level, ROUNDS_PER_SESSION);
+        sessionStorage.setItem(serverSessionKey, round.session_id);
+      }
+      const { quiz_words: meaningDetailsList, session_info: sessionInfo, stats: wordsStats } = round;
 
       if (meaningDetailsList.length === 0) {
         // --- THIS IS THE TRIGGER FOR THE DEBRIEF ---
@@ -98,8 +108,6 @@ export const useQuizStore = create((set, get) => ({
         return;
       }
       
-      const itemKeys = meaningDetailsList.map(detail => detail.item_key);
-      const wordsStats = await api.fetchWordStats(itemKeys, level);
       const newQuizItems = createQuizItems(meaningDetailsList, wordsStats);
       const sanitizedQuizItems = newQuizItems.map(({ correctAnswers, fullDetails, ...item }) => item);
       const initialFeedback = 'Fill all fields and press Enter to submit.';